@@ -25,6 +25,9 @@ st.markdown("""
 
 #### 🔮 4. 에너지 예측 결과 보기
 - **기능**: Amazon SageMaker의 엔드포인트로부터 예측값을 받아와, **activePower / 전기요금 / 탄소배출량** 등의 **시간대별 예측 결과를 시각화**할 수 있습니다.
+
+#### 🏭 5. 전체 설비 현황
+- **기능**: 선택한 기간의 **전체 모듈**을 한 번에 집계해 **모듈별 평균 유효전력 / 역률 / 전류 불평형률 / 이상치 수**와 **모듈 × 시간 히트맵**을 확인할 수 있습니다.
 """)
 
 
@@ -0,0 +1,204 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_store import (
+    AVAILABLE_MODULES, COUNTER_COLUMNS, METRIC_COLUMNS, STORE_DIR,
+    append_segment, load_module, module_lock, read_window, store_end, write_dataset,
+)
+from instrumentation import stage
+
+FEATURES = list(METRIC_COLUMNS)
+TOP_K = 3
+# 학습 구간 재구성 오차의 이 분위수를 total_error 1.0으로 정규화
+NORMALIZE_QUANTILE = 0.99
+EXPLAINED_VARIANCE = 0.9
+# 기본 이상치 기준 (정규화된 total_error)
+ANOMALY_THRESHOLD = 1.0
+# 주성분으로 거의 완전히 설명되는 지표가 작은 잔차로 과대평가되지 않도록 하는 하한 (표준화 단위)
+MIN_RESIDUAL_SCALE = 0.05
+# 저장 모델 형식이 바뀌면 올려서 기존 모델을 다시 학습하게 함 (2: 주성분 투영 전 평균 중심화)
+MODEL_VERSION = 2
+
+
+def scores_path(module_id, store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'scores', f'module{module_id}.parquet')
+
+
+def model_path(module_id, store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'scores', f'module{module_id}_model.npz')
+
+
+def feature_matrix(df, prev_energy=np.nan):
+    """
+    15개 전기 지표를 (행 × 지표) float64 행렬로 변환
+    누적 카운터는 그대로 쓰면 항상 증가하므로 직전 행과의 차분(구간 사용량)으로 바꿈
+    """
+    X = np.column_stack([df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in FEATURES])
+    for col in COUNTER_COLUMNS:
+        j = FEATURES.index(col)
+        X[:, j] = np.diff(X[:, j], prepend=prev_energy)
+    return X
+
+
+def _standardize(X, model):
+    Z = (X - model['center']) / model['scale']
+    # 결측 지표는 중앙값으로 간주해 오차에 기여하지 않게 함
+    return np.nan_to_num(Z, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _residuals(Z, model):
+    # 주성분은 평균을 뺀 Z로 학습했으므로 투영/재구성도 같은 중심에서 함
+    Zc = Z - model['mean']
+    V = model['components']
+    R = Zc - (Zc @ V) @ V.T
+    if 'residual_scale' in model:
+        # 지표마다 평소 잔차 크기로 나눠 기여도를 서로 비교할 수 있게 함
+        R = R / model['residual_scale']
+    return R
+
+
+def _last_energy(df):
+    # 증분 채점 시 첫 행의 차분을 이어서 계산하기 위해 마지막 누적값을 보관
+    values = df[COUNTER_COLUMNS[0]].to_numpy(dtype=np.float64)
+    return values[-1:] if len(values) else np.array([np.nan])
+
+
+def fit_model(df):
+    """
+    중앙값/MAD로 지표를 표준화한 뒤 PCA 주성분을 학습 (정상 패턴 재구성용)
+    """
+    X = feature_matrix(df)
+    center = np.nanmedian(X, axis=0)
+    mad = np.nanmedian(np.abs(X - center), axis=0) * 1.4826
+    scale = np.where(np.isfinite(mad) & (mad > 1e-9), mad, 1.0)
+    model = {'center': center, 'scale': scale}
+
+    Z = _standardize(X, model)
+    model['mean'] = Z.mean(axis=0)
+    _, s, vt = np.linalg.svd(Z - model['mean'], full_matrices=False)
+    ratio = np.cumsum(s ** 2) / max(np.sum(s ** 2), 1e-12)
+    k = int(np.searchsorted(ratio, EXPLAINED_VARIANCE) + 1)
+    model['components'] = vt[:min(k, len(FEATURES) - 1)].T
+
+    R = _residuals(Z, model)
+    model['residual_scale'] = np.maximum(np.sqrt(np.mean(R ** 2, axis=0)), MIN_RESIDUAL_SCALE)
+    R = R / model['residual_scale']
+    raw_error = np.sqrt(np.mean(R ** 2, axis=1))
+    model['error_scale'] = np.array(max(np.quantile(raw_error, NORMALIZE_QUANTILE), 1e-9))
+    model['last_energy'] = _last_energy(df)
+    model['version'] = np.array(MODEL_VERSION)
+    return model
+
+
+def score_frame(model, df, prev_energy=np.nan):
+    """
+    행 전체를 한 번에 채점해 timestamp, total_error, top_k_feature 컬럼의 DataFrame 반환
+    """
+    X = feature_matrix(df, prev_energy)
+    R = _residuals(_standardize(X, model), model)
+    contrib = R ** 2
+    total_error = np.sqrt(contrib.mean(axis=1)) / model['error_scale']
+    top = np.argsort(-contrib, axis=1)[:, :TOP_K]
+
+    out = pd.DataFrame({
+        'timestamp': df['localtime'].to_numpy(),
+        'total_error': total_error.astype(np.float32),
+    })
+    names = np.array(FEATURES)
+    for k in range(TOP_K):
+        out[f'top_{k + 1}_feature'] = pd.Categorical(names[top[:, k]], categories=FEATURES)
+    return out
+
+
+def save_model(model, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+        np.savez(f, **model)
+    os.replace(f.name, path)
+
+
+def load_model(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def model_version(path):
+    """
+    저장된 모델 형식 번호 (형식 번호가 없는 이전 모델은 1, 파일이 없으면 None)
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return int(data['version']) if 'version' in data.files else 1
+
+
+def _write_scores(scores, path):
+    write_dataset(pa.Table.from_pandas(scores, preserve_index=False), path, compression='zstd')
+
+
+def score_module(module_id, refit=False, new_rows=None, store_dir=STORE_DIR):
+    """
+    모듈 점수를 저장소에 유지하며 반환
+    - 저장된 모델/점수가 없거나 모델 형식(MODEL_VERSION)이 다르거나 refit=True면 전체 이력으로 학습 후 한 번에 채점
+    - 있으면 마지막 채점 시각 이후의 행만 채점해 추가 세그먼트로 씀 (기존 점수 파일은 다시 쓰지 않음)
+    new_rows: 저장소에 아직 반영되지 않은 신규 원본 행 (실시간 수집용). 이때는 새로 채점한 행만 반환
+    """
+    s_path, m_path = scores_path(module_id, store_dir), model_path(module_id, store_dir)
+    with module_lock(module_id, store_dir):
+        if refit or not os.path.exists(s_path) or model_version(m_path) != MODEL_VERSION:
+            df = load_module(module_id, columns=FEATURES, store_dir=store_dir)
+            with stage('anomaly.fit', rows=len(df)):
+                model = fit_model(df)
+            with stage('anomaly.score', rows=len(df)):
+                scores = score_frame(model, df)
+            save_model(model, m_path)
+            _write_scores(scores, s_path)
+            if new_rows is None:
+                return scores
+
+        model = load_model(m_path)
+        last_ts = store_end(s_path, 'timestamp')
+
+        fresh = load_module(module_id, columns=FEATURES, start=last_ts, store_dir=store_dir)
+        if new_rows is not None and len(new_rows):
+            fresh = pd.concat([fresh, new_rows[['localtime'] + FEATURES]], ignore_index=True)
+            fresh = fresh.drop_duplicates('localtime', keep='last').sort_values('localtime', kind='stable')
+        if last_ts is not None:
+            fresh = fresh[fresh['localtime'] > last_ts]
+        if fresh.empty:
+            return fresh.iloc[:0] if new_rows is not None else read_window(s_path, time_col='timestamp')
+
+        with stage('anomaly.score', rows=len(fresh)):
+            tail = score_frame(model, fresh, prev_energy=float(model['last_energy'][0]))
+        model['last_energy'] = _last_energy(fresh)
+        save_model(model, m_path)
+        append_segment(pa.Table.from_pandas(tail, preserve_index=False), s_path, 'timestamp', compression='zstd')
+        return tail if new_rows is not None else read_window(s_path, time_col='timestamp')
+
+
+def get_anomaly_df(module_id, store_dir=STORE_DIR):
+    """
+    모듈의 이상치 점수 DataFrame 반환 (timestamp, total_error, top_1_feature ...)
+    """
+    return score_module(module_id, store_dir=store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈별 이상치 점수 계산")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--refit', action='store_true', help="전체 이력으로 모델을 다시 학습")
+    args = parser.parse_args()
+
+    for module_id in args.modules:
+        scores = score_module(module_id, refit=args.refit, store_dir=args.store_dir)
+        print(f"module{module_id}: {len(scores)}행 채점, total_error > {ANOMALY_THRESHOLD}: {(scores['total_error'] > ANOMALY_THRESHOLD).sum()}건")
+
+
+if __name__ == '__main__':
+    main()
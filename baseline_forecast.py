@@ -0,0 +1,169 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import AVAILABLE_MODULES, load_module
+from instrumentation import stage
+from tariff import BILL_RATE, CARBON_FACTOR, hour_of_week
+
+DAY = 24
+WEEK = 24 * 7
+# 계절 프로파일(요일 × 시각 평균)을 만들 최근 주 수
+PROFILE_WEEKS = 4
+RIDGE_ALPHA = 1.0
+MODEL_VERSION = 'local:seasonal-ridge-v1'
+
+
+def hourly_matrix(frames):
+    """
+    {모듈: DataFrame}의 activePower를 공통 1시간 격자에 맞춘 (모듈 × 시간) 행렬로 변환
+    빈 시간은 앞뒤 값으로 선형 보간. 반환: (모듈 목록, 시간 인덱스, 행렬)
+    """
+    series = {}
+    for module_id, df in frames.items():
+        times = pd.to_datetime(df['localtime'], errors='coerce')
+        values = pd.to_numeric(df['activePower'], errors='coerce').to_numpy(dtype=np.float64)
+        s = pd.Series(values, index=times).loc[lambda x: x.index.notna()]
+        series[module_id] = s.groupby(s.index.floor('h')).mean()
+    wide = pd.DataFrame(series)
+    grid = pd.date_range(wide.index.min(), wide.index.max(), freq='h')
+    wide = wide.reindex(grid).interpolate(limit_direction='both')
+    return list(wide.columns), grid, wide.to_numpy().T
+
+
+def _seasonal_profile(Y, how, weeks=PROFILE_WEEKS):
+    """
+    최근 weeks주의 요일 × 시각 평균 (모듈 × 168). 계절 naive 예측값으로 사용
+    """
+    tail = slice(max(Y.shape[1] - weeks * WEEK, 0), Y.shape[1])
+    counts = np.bincount(how[tail], minlength=WEEK)
+    sums = np.zeros((Y.shape[0], WEEK))
+    np.add.at(sums.T, how[tail], Y[:, tail].T)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profile = sums / counts
+    # 관측이 없는 요일·시각은 모듈 평균으로 채움
+    return np.where(np.isnan(profile), Y.mean(axis=1, keepdims=True), profile)
+
+
+def _features(Y, idx, profile, how):
+    return np.stack([
+        Y[:, idx - DAY],
+        Y[:, idx - WEEK],
+        profile[:, how],
+        np.ones((Y.shape[0], len(idx))),
+    ], axis=2)
+
+
+def fit_ridge(Y, profile, how, alpha=RIDGE_ALPHA):
+    """
+    모든 모듈의 ridge 회귀(y_t ~ y_t-24, y_t-168, 계절 프로파일, 절편)를 배치로 한 번에 풂
+    반환: (모듈 × 4) 계수. 절편은 규제하지 않음
+    """
+    idx = np.arange(WEEK, Y.shape[1])
+    X = _features(Y, idx, profile, how[idx])
+    y = Y[:, idx]
+    penalty = alpha * np.diag([1.0, 1.0, 1.0, 0.0])
+    XtX = np.einsum('mnf,mng->mfg', X, X) + penalty
+    Xty = np.einsum('mnf,mn->mf', X, y)
+    return np.linalg.solve(XtX, Xty[..., None])[..., 0]
+
+
+def forecast_matrix(Y, grid, start, hours, alpha=RIDGE_ALPHA):
+    """
+    (모듈 × 시간) 이력으로 [start, start + hours) 구간의 모듈별 시간당 전력을 예측
+    24시간 블록 단위로 재귀 예측하므로 한 블록 안에서는 전 모듈/전 시간을 한 번에 계산
+    반환: (예측 시간 인덱스, 모듈 × hours 행렬)
+    """
+    if Y.shape[1] <= WEEK:
+        raise ValueError(f"예측에는 최소 {WEEK + 1}시간의 이력이 필요합니다.")
+    start = pd.Timestamp(start)
+    # 이력 안쪽이나 정시가 아닌 시각에서 시작하면 예측 격자에서 찾지 못해 이력 값을 예측처럼 돌려주게 됨
+    if start <= grid[-1]:
+        raise ValueError(f"예측 시작 시각({start})은 이력의 마지막 시각({grid[-1]}) 이후여야 합니다.")
+    if start != start.floor('h'):
+        raise ValueError(f"예측 시작 시각({start})은 정시여야 합니다.")
+    # 모듈별 평균으로 나눠 특성 크기를 맞춘 뒤 같은 규제 강도로 학습
+    scale = Y.mean(axis=1, keepdims=True)
+    scale = np.where(scale > 0, scale, 1.0)
+    Yn = Y / scale
+
+    target = pd.date_range(start, periods=hours, freq='h')
+    full = pd.date_range(grid[0], max(target[-1], grid[-1]), freq='h')
+    how = hour_of_week(full)
+    profile = _seasonal_profile(Yn, how[:Y.shape[1]])
+    coef = fit_ridge(Yn, profile, how[:Y.shape[1]], alpha)
+
+    ext = np.concatenate([Yn, np.zeros((Y.shape[0], len(full) - Y.shape[1]))], axis=1)
+    for block in range(Y.shape[1], len(full), DAY):
+        idx = np.arange(block, min(block + DAY, len(full)))
+        ext[:, idx] = np.einsum('mnf,mf->mn', _features(ext, idx, profile, how[idx]), coef)
+
+    pos = full.get_indexer(target)
+    return target, ext[:, pos] * scale
+
+
+def to_output(target, per_module):
+    """
+    모듈별 예측을 엔드포인트 응답과 같은 형태로 변환
+    hourly_pow = 전체 모듈 합, may_bill/may_carbon = hourly_pow × 단가/배출계수, agg_pow = 예측 구간 합계
+    """
+    hourly_pow = np.nansum(per_module, axis=0)
+    return pd.DataFrame({
+        'id': target,
+        'hourly_pow': hourly_pow,
+        'may_bill': hourly_pow * BILL_RATE,
+        'may_carbon': hourly_pow * CARBON_FACTOR,
+        'agg_pow': np.full(len(target), hourly_pow.sum()),
+    })
+
+
+def baseline_forecast(frames, start, hours, alpha=RIDGE_ALPHA):
+    modules, grid, Y = hourly_matrix(frames)
+    target, per_module = forecast_matrix(Y, grid, start, hours, alpha)
+    return to_output(target, per_module)
+
+
+class LocalForecaster:
+    """
+    엔드포인트 없이 로컬에서 예측하는 백엔드. InferenceClient와 같은 predict/version/last_stats 인터페이스
+    """
+
+    def __init__(self, start, hours, alpha=RIDGE_ALPHA):
+        self.start = pd.Timestamp(start)
+        self.hours = hours
+        self.alpha = alpha
+        self.last_stats = {'chunks': 0, 'cache_hits': 0}
+
+    def version(self):
+        return MODEL_VERSION
+
+    def predict(self, frames, on_progress=None):
+        with stage('predict.local', rows=sum(len(df) for df in frames.values())):
+            result = baseline_forecast(frames, self.start, self.hours, self.alpha)
+        self.last_stats = {'chunks': 1, 'cache_hits': 0}
+        if on_progress is not None:
+            on_progress(1, 1)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장소 이력으로 전체 모듈 기준 예측 생성 (계절 naive + ridge)")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--start', default='2025-05-10')
+    parser.add_argument('--hours', type=int, default=505)
+    parser.add_argument('--output', default=None, help="CSV로 저장할 경로")
+    args = parser.parse_args()
+
+    frames = {m: load_module(m, columns=['activePower']) for m in args.modules}
+    started = time.perf_counter()
+    out = baseline_forecast(frames, args.start, args.hours)
+    print(f"{len(args.modules)}개 모듈, {args.hours}시간 예측: {time.perf_counter() - started:.3f}초")
+    if args.output:
+        out.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(out.head().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from anomaly_engine import ANOMALY_THRESHOLD, score_module
+from data_store import AVAILABLE_MODULES, CSV_DIR, STORE_DIR, ingest_module, load_module
+from rollup import build_rollups
+
+
+def summary_path(store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'fleet_summary.csv')
+
+
+def process_module(module_id, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    모듈 하나에 대해 변환 → 이상치 채점 → 롤업 생성을 수행하고 요약 dict 반환
+    (프로세스 풀 워커에서 실행되므로 결과는 파일로 남기고 작은 요약만 돌려줌)
+    """
+    started = time.perf_counter()
+    ingest_module(module_id, csv_dir, store_dir)
+    # 저장소를 새로 만들었으므로 모델도 전체 이력으로 다시 학습
+    scores = score_module(module_id, refit=True, store_dir=store_dir)
+    build_rollups(module_id, store_dir)
+
+    df = load_module(module_id, columns=['equipment', 'activePower', 'accumActiveEnergy'], store_dir=store_dir)
+    energy = df['accumActiveEnergy'].dropna()
+    return {
+        'module': module_id,
+        'equipment': str(df['equipment'].iloc[0]) if len(df) else '',
+        'rows': len(df),
+        'start': df['localtime'].min(),
+        'end': df['localtime'].max(),
+        'activePower_mean': float(df['activePower'].mean()),
+        'energy': float(energy.iloc[-1] - energy.iloc[0]) if len(energy) else float('nan'),
+        'anomalies': int((scores['total_error'] > ANOMALY_THRESHOLD).sum()),
+        'max_error': float(scores['total_error'].max()) if len(scores) else float('nan'),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def run_batch(modules=None, workers=None, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    모듈들을 프로세스 풀로 병렬 처리하고 전체 요약을 store_dir/fleet_summary.csv로 저장
+    실패한 모듈은 {모듈: 오류} dict로 함께 반환
+    """
+    modules = AVAILABLE_MODULES if modules is None else modules
+    workers = workers or os.cpu_count() or 1
+    rows, failures = [], {}
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(modules))) as pool:
+        futures = {pool.submit(process_module, m, csv_dir, store_dir): m for m in modules}
+        for future in as_completed(futures):
+            module_id = futures[future]
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                failures[module_id] = e
+
+    summary = pd.DataFrame(rows)
+    if not summary.empty:
+        # 일부 모듈만 돌린 경우 나머지 모듈의 기존 요약은 유지
+        path = summary_path(store_dir)
+        if os.path.exists(path):
+            previous = pd.read_csv(path, encoding='utf-8-sig', parse_dates=['start', 'end'])
+            previous = previous[~previous['module'].isin(summary['module'])]
+            summary = pd.concat([previous, summary], ignore_index=True)
+        summary = summary.sort_values('module').reset_index(drop=True)
+        os.makedirs(store_dir, exist_ok=True)
+        summary.to_csv(path, index=False, encoding='utf-8-sig')
+    return summary, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전체 모듈 일괄 처리 (변환, 이상치 채점, 롤업)")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--workers', type=int, default=None, help="기본값: CPU 코어 수")
+    parser.add_argument('--csv-dir', default=CSV_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary, failures = run_batch(args.modules, args.workers, args.csv_dir, args.store_dir)
+    if not summary.empty:
+        print(summary.to_string(index=False))
+        print(f"요약 저장: {summary_path(args.store_dir)}")
+    for module_id, error in sorted(failures.items()):
+        print(f"module{module_id} 처리 실패: {error}", file=sys.stderr)
+    print(f"총 {len(summary)}개 모듈, {time.perf_counter() - started:.2f}초")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
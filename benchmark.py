@@ -0,0 +1,241 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from anomaly_engine import FEATURES, fit_model, score_frame, score_module
+from baseline_forecast import baseline_forecast
+from charts import COLUMN_GROUPS, group_figure
+from data_service import ModuleCache
+from data_store import AVAILABLE_MODULES, CSV_DIR, STORE_DIR, csv_path, ingest_module, load_module
+from downsample import DEFAULT_POINTS
+from payload_codec import CODECS, encode_frame
+from rollup import build_rollups, load_rollup, pick_level
+from upload_reader import read_zip
+
+DEFAULT_SCALES = [1, 10]
+DEFAULT_REPEAT = 3
+WINDOW = pd.Timedelta(days=7)
+
+
+def results_dir(store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'benchmarks')
+
+
+def scale_csv(src, dst, factor):
+    """
+    번들 CSV를 factor배로 늘린 합성 CSV 작성. 복사본마다 시간을 원본 기간만큼 뒤로 밀고
+    누적 에너지도 이어지게 더해 실제와 같은 연속 시계열로 만듦
+    """
+    if factor == 1:
+        shutil.copyfile(src, dst)
+        return
+    base = pd.read_csv(src)
+    times = pd.to_datetime(base['localtime'])
+    span = times.max() - times.min() + pd.Timedelta(hours=1)
+    energy_span = base['accumActiveEnergy'].max() - base['accumActiveEnergy'].min()
+    with open(dst, 'w', encoding='utf-8', newline='') as f:
+        for i in range(factor):
+            part = base.copy()
+            part['localtime'] = (times + span * i).dt.strftime('%Y-%m-%d %H:%M:%S')
+            part['accumActiveEnergy'] = base['accumActiveEnergy'] + energy_span * i
+            part.to_csv(f, index=False, header=(i == 0))
+
+
+def measure(fn, repeat):
+    """
+    fn을 repeat번 실행한 소요 시간(초) 목록과 마지막 반환값
+    """
+    seconds, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - started)
+    return seconds, result
+
+
+def _record(results, scale, stage, seconds, rows=None, nbytes=None):
+    entry = {
+        'scale': scale,
+        'stage': stage,
+        'repeat': len(seconds),
+        'min_s': round(min(seconds), 6),
+        'median_s': round(statistics.median(seconds), 6),
+        'rows': rows,
+        'bytes': nbytes,
+    }
+    if rows:
+        entry['rows_per_s'] = round(rows / max(min(seconds), 1e-9))
+    results.append(entry)
+    print(f"  {stage:<28} {entry['median_s'] * 1000:>10.1f} ms" + (f"  ({rows:,}행)" if rows else ""))
+
+
+def _zip_csvs(csv_dir, modules):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for m in modules:
+            zf.write(csv_path(m, csv_dir), f'module{m}.csv')
+    return buf.getvalue()
+
+
+def run_scale(scale, modules, repeat, work_dir):
+    """
+    scale배 합성 데이터로 전 단계를 측정해 결과 목록 반환
+    """
+    csv_dir = os.path.join(work_dir, f'x{scale}', 'csv')
+    store_dir = os.path.join(work_dir, f'x{scale}', 'store')
+    os.makedirs(csv_dir, exist_ok=True)
+    for m in modules:
+        scale_csv(csv_path(m, CSV_DIR), csv_path(m, csv_dir), scale)
+    csv_bytes = sum(os.path.getsize(csv_path(m, csv_dir)) for m in modules)
+    results = []
+    print(f"[x{scale}] {len(modules)}개 모듈, CSV {csv_bytes / 1e6:,.1f} MB")
+
+    # 1. CSV → Parquet 저장소 변환 (파생 지표 포함)
+    seconds, _ = measure(lambda: [ingest_module(m, csv_dir, store_dir) for m in modules], 1)
+    frames = {m: load_module(m, csv_dir=csv_dir, store_dir=store_dir) for m in modules}
+    rows = sum(len(df) for df in frames.values())
+    _record(results, scale, 'ingest', seconds, rows, csv_bytes)
+
+    # 2. 저장소 전체 읽기 (load_data와 같은 경로) / 공유 캐시 적중
+    seconds, _ = measure(lambda: [load_module(m, csv_dir=csv_dir, store_dir=store_dir) for m in modules], repeat)
+    _record(results, scale, 'load_full', seconds, rows)
+    cache = ModuleCache(csv_dir=csv_dir, store_dir=store_dir)
+    for m in modules:
+        cache.get(m)
+    seconds, _ = measure(lambda: [cache.get(m) for m in modules], repeat)
+    _record(results, scale, 'load_shared_cache_hit', seconds, rows)
+
+    # 3. 마지막 1주 구간 필터 (row group pushdown / 공유 캐시 뷰)
+    end = max(df['localtime'].max() for df in frames.values())
+    start = end - WINDOW
+    seconds, windows = measure(
+        lambda: [load_module(m, start=start, end=end, csv_dir=csv_dir, store_dir=store_dir) for m in modules], repeat)
+    _record(results, scale, 'window_filter_store', seconds, sum(len(w) for w in windows))
+    seconds, windows = measure(lambda: [cache.window(m, None, start, end) for m in modules], repeat)
+    _record(results, scale, 'window_filter_cache', seconds, sum(len(w) for w in windows))
+
+    # 4. 차트 페이로드 생성 (모든 지표 그룹, 원본 축약 경로 / 롤업 경로)
+    m0 = modules[0]
+    df0 = frames[m0]
+    seconds, figures = measure(lambda: [group_figure(df0, g).to_json() for g in COLUMN_GROUPS], repeat)
+    _record(results, scale, 'figures_raw', seconds, len(df0), sum(len(f) for f in figures))
+
+    build_rollups(m0, store_dir)
+    full_start, full_end = df0['localtime'].min(), df0['localtime'].max() + pd.Timedelta(hours=1)
+    level = pick_level(full_start, full_end, DEFAULT_POINTS) or '1h'
+    columns = [f'{c}_{agg}' for cols in COLUMN_GROUPS.values() for c in cols for agg in ('min', 'max', 'mean')]
+
+    def rollup_figures():
+        rolled = load_rollup(m0, level, columns=columns, start=full_start, end=full_end, store_dir=store_dir)
+        return [group_figure(rolled, g, level).to_json() for g in COLUMN_GROUPS]
+
+    seconds, figures = measure(rollup_figures, repeat)
+    _record(results, scale, f'figures_rollup_{level}', seconds, len(df0), sum(len(f) for f in figures))
+
+    # 5. 이상치 채점 (학습 + 채점 / 채점만)
+    seconds, _ = measure(lambda: [score_module(m, refit=True, store_dir=store_dir) for m in modules], 1)
+    _record(results, scale, 'score_refit', seconds, rows)
+    model = fit_model(df0[['localtime'] + FEATURES])
+    seconds, _ = measure(lambda: score_frame(model, df0), repeat)
+    _record(results, scale, 'score_frame', seconds, len(df0))
+
+    # 6. 업로드 파싱 (전 모듈 ZIP)
+    payload = _zip_csvs(csv_dir, modules)
+    seconds, _ = measure(lambda: read_zip(io.BytesIO(payload)), repeat)
+    _record(results, scale, 'upload_parse_zip', seconds, rows, len(payload))
+
+    # 7. 예측 요청 페이로드 직렬화 (한 모듈, 형식 × gzip). 4페이지처럼 업로드 CSV를 그대로 보냄
+    request_df = pd.read_csv(csv_path(m0, csv_dir))
+    for fmt in CODECS:
+        for compress in (False, True):
+            seconds, (body, _) = measure(lambda: encode_frame(request_df, fmt, compress), repeat)
+            name = f"encode_{fmt}{'_gzip' if compress else ''}"
+            _record(results, scale, name, seconds, len(request_df), len(body))
+
+    # 8. 로컬 기준 예측 (전 모듈 배치)
+    history = {m: df[['localtime', 'activePower']] for m, df in frames.items()}
+    forecast_start = end + pd.Timedelta(hours=1)
+    seconds, _ = measure(lambda: baseline_forecast(history, forecast_start, 24 * 21), repeat)
+    _record(results, scale, 'baseline_forecast', seconds, rows)
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    """
+    이전 결과 파일과 단계별 중앙값 비교 (ratio > 1이면 느려짐)
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = pd.DataFrame(baseline['results']).set_index(['scale', 'stage'])['median_s']
+    new = pd.DataFrame(current['results']).set_index(['scale', 'stage'])['median_s']
+    table = pd.DataFrame({'before_s': old, 'after_s': new}).dropna()
+    table['ratio'] = (table['after_s'] / table['before_s']).round(3)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="번들 CSV와 합성 확대 데이터로 주요 경로 성능 측정")
+    parser.add_argument('--scales', type=int, nargs='*', default=DEFAULT_SCALES, help="행 수 배율 (예: 1 10 100)")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본: store/benchmarks/<시각>.json)")
+    parser.add_argument('--baseline', default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument('--keep', action='store_true', help="합성 데이터 임시 폴더를 지우지 않음")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_')
+    results = []
+    try:
+        for scale in args.scales:
+            results.extend(run_scale(scale, args.modules, args.repeat, work_dir))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'modules': args.modules,
+            'scales': args.scales,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(results_dir(), f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"결과 저장: {output}")
+
+    if args.baseline:
+        print(compare(report, args.baseline).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import numpy as np
+import plotly.colors
+import plotly.graph_objects as go
+
+from downsample import DEFAULT_POINTS, downsample_indices, downsample_series
+
+PALETTE = plotly.colors.qualitative.Plotly
+
+COLUMN_GROUPS = {
+    "Phase Voltages": ['voltageR', 'voltageS', 'voltageT'],
+    "Line Voltages": ['voltageRS', 'voltageST', 'voltageTR'],
+    "Currents": ['currentR', 'currentS', 'currentT'],
+    "Power Factors": ['powerFactorR', 'powerFactorS', 'powerFactorT', 'powerFactorMean'],
+    "Power Metrics": ['activePower', 'reactivePowerLagging', 'apparentPower'],
+    # 저장 시점에 계산된 파생 지표
+    "Imbalance (%)": ['currentImbalance', 'voltageImbalance'],
+    "Interval Energy": ['intervalEnergy'],
+}
+
+
+def _translucent(color, alpha=0.2):
+    r, g, b = plotly.colors.hex_to_rgb(color)
+    return f'rgba({r}, {g}, {b}, {alpha})'
+
+
+def group_figure(df, group_name, level=None):
+    """
+    지표 그룹 하나의 추이 차트 생성
+    level이 None이면 원본 행을 축약해 그리고, 롤업 단위면 평균 선 + 최솟값~최댓값 띠로 그림
+    """
+    fig = go.Figure()
+
+    for i, col_name in enumerate(COLUMN_GROUPS[group_name]):
+        if level is None:
+            x, y = downsample_series(df['localtime'], df[col_name])
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines',
+                name=col_name
+            ))
+            continue
+
+        # 버킷별 최댓값의 최댓값/최솟값의 최솟값 위치를 합쳐 골라야 평균에 묻히는 스파이크가 남음
+        half = DEFAULT_POINTS // 2
+        idx = np.union1d(downsample_indices(df['localtime'], df[f'{col_name}_max'], half),
+                         downsample_indices(df['localtime'], df[f'{col_name}_min'], half))
+        part = df.iloc[idx]
+        color = PALETTE[i % len(PALETTE)]
+        # 최솟값~최댓값 범위를 반투명 띠로, 평균을 선으로 그림
+        fig.add_trace(go.Scatter(
+            x=part['localtime'],
+            y=part[f'{col_name}_max'],
+            mode='lines',
+            line=dict(width=0, color=color),
+            legendgroup=col_name,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=part['localtime'],
+            y=part[f'{col_name}_min'],
+            mode='lines',
+            line=dict(width=0, color=color),
+            fill='tonexty',
+            fillcolor=_translucent(color),
+            legendgroup=col_name,
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=part['localtime'],
+            y=part[f'{col_name}_mean'],
+            customdata=part[[f'{col_name}_min', f'{col_name}_max']],
+            hovertemplate="평균 %{y:.2f}<br>최소 %{customdata[0]:.2f} / 최대 %{customdata[1]:.2f}",
+            mode='lines',
+            line=dict(color=color),
+            legendgroup=col_name,
+            name=col_name
+        ))
+
+    fig.update_layout(
+        title=f"{group_name} 추이",
+        xaxis_title="시간",
+        yaxis_title="값",
+        height=400,
+        margin=dict(t=40, b=40),
+        legend_title_text='지표'
+    )
+    return fig
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+CANDIDATE_COLUMNS = ['activePower', 'currentR', 'currentS', 'currentT', 'powerFactorR', 'powerFactorS', 'powerFactorT']
+# 저장소 값은 float32이므로 반올림 차이는 변경으로 보지 않음
+RTOL = 1e-4
+ATOL = 1e-6
+
+
+def align_frames(raw, cleaned, columns, raw_time='localtime', cleaned_time='timestamp'):
+    """
+    원본과 정제본을 timestamp 기준으로 outer merge-join. 비교 컬럼은 숫자로 변환 (변환 안 되는 값은 NaN)
+    같은 시각이 여러 번 있으면 마지막 행만 사용. in_raw/in_cleaned로 각 쪽에 행이 있었는지 표시
+    """
+    left = raw[[raw_time] + columns].rename(columns={raw_time: 'timestamp'})
+    right = cleaned[[cleaned_time] + columns].rename(columns={cleaned_time: 'timestamp'})
+    left = left.assign(timestamp=pd.to_datetime(left['timestamp']).astype('datetime64[ns]'), in_raw=True)
+    right = right.assign(timestamp=pd.to_datetime(right['timestamp']).astype('datetime64[ns]'), in_cleaned=True)
+    left = left.drop_duplicates('timestamp', keep='last')
+    right = right.drop_duplicates('timestamp', keep='last')
+    # 정제본에 숫자가 아닌 값('bad' 등)이 섞여 있어도 비교할 수 있도록 결측으로 바꿈
+    left[columns] = left[columns].apply(pd.to_numeric, errors='coerce')
+    right[columns] = right[columns].apply(pd.to_numeric, errors='coerce')
+
+    aligned = pd.merge(left, right, on='timestamp', how='outer', sort=True, suffixes=('_before', '_after'))
+    aligned['in_raw'] = aligned['in_raw'].fillna(False).astype(bool)
+    aligned['in_cleaned'] = aligned['in_cleaned'].fillna(False).astype(bool)
+    return aligned
+
+
+def _run_lengths(changed):
+    """
+    (행 × 컬럼) bool 배열에서 컬럼별 연속 True 구간을 (컬럼 위치, 시작 행, 끝 행(포함)) 배열로 반환
+    """
+    padded = np.zeros((changed.shape[0] + 2, changed.shape[1]), dtype=np.int8)
+    padded[1:-1] = changed
+    # 전치해서 nonzero를 구하면 컬럼 → 행 순서로 정렬되어 시작/끝이 짝지어짐
+    edges = np.diff(padded, axis=0).T
+    col, start = np.nonzero(edges == 1)
+    _, stop = np.nonzero(edges == -1)
+    return col, start, stop - 1
+
+
+def compare_frames(raw, cleaned, columns=None, raw_time='localtime', cleaned_time='timestamp'):
+    """
+    원본/정제본을 시간 기준으로 맞춘 뒤 모든 컬럼을 한 번에 비교
+    반환: (aligned, stats, intervals)
+    - aligned: timestamp, {컬럼}_before, {컬럼}_after, in_raw, in_cleaned
+    - stats: 컬럼별 원본/정제 NaN 수, 삭제된 행·값, 보간된 값, 수정된 값, 최대 편차, 변경 구간 수
+    - intervals: 컬럼별 변경 구간 (column, start, end, rows)
+    """
+    if columns is None:
+        columns = [c for c in CANDIDATE_COLUMNS if c in raw.columns and c in cleaned.columns]
+    aligned = align_frames(raw, cleaned, columns, raw_time, cleaned_time)
+
+    before = aligned[[f'{c}_before' for c in columns]].to_numpy(dtype=np.float64, na_value=np.nan)
+    after = aligned[[f'{c}_after' for c in columns]].to_numpy(dtype=np.float64, na_value=np.nan)
+    in_raw = aligned['in_raw'].to_numpy()[:, None]
+    in_cleaned = aligned['in_cleaned'].to_numpy()[:, None]
+    both = in_raw & in_cleaned
+
+    nan_before = np.isnan(before)
+    nan_after = np.isnan(after)
+    rows_removed = in_raw & ~in_cleaned
+    rows_added = in_cleaned & ~in_raw
+    imputed = both & nan_before & ~nan_after
+    dropped = both & ~nan_before & nan_after
+    with np.errstate(invalid='ignore'):
+        deviation = np.where(both & ~nan_before & ~nan_after, np.abs(after - before), 0.0)
+        modified = deviation > ATOL + RTOL * np.abs(np.nan_to_num(before))
+    changed = imputed | dropped | modified | rows_removed | rows_added
+
+    stats = pd.DataFrame({
+        'column': columns,
+        'nan_before': (nan_before & in_raw).sum(axis=0),
+        'nan_after': (nan_after & in_cleaned).sum(axis=0),
+        'rows_removed': np.broadcast_to(rows_removed, changed.shape).sum(axis=0),
+        'rows_added': np.broadcast_to(rows_added, changed.shape).sum(axis=0),
+        'values_imputed': imputed.sum(axis=0),
+        'values_dropped': dropped.sum(axis=0),
+        'values_modified': modified.sum(axis=0),
+        'max_deviation': deviation.max(axis=0) if len(aligned) else np.zeros(len(columns)),
+        'changed_rows': changed.sum(axis=0),
+    })
+
+    col, start, stop = _run_lengths(changed)
+    timestamps = aligned['timestamp'].to_numpy()
+    intervals = pd.DataFrame({
+        'column': np.asarray(columns, dtype=object)[col],
+        'start': timestamps[start],
+        'end': timestamps[stop],
+        'rows': stop - start + 1,
+    })
+    stats['intervals'] = np.bincount(col, minlength=len(columns))
+    return aligned, stats, intervals
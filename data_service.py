@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from data_store import CSV_DIR, STORE_DIR, dataset_signature, ensure_store, read_files, read_window
+from instrumentation import count
+
+# 프로세스 전체가 공유하는 모듈 데이터 메모리 한도 (MB, 환경변수로 조정)
+MEMORY_BUDGET_MB = int(os.environ.get('DATA_CACHE_MB', '512'))
+
+
+class ModuleCache:
+    """
+    모듈별 저장소 전체를 프로세스당 한 번만 메모리에 올려 모든 세션이 공유하는 읽기 전용 캐시
+    - 저장소 스키마 그대로 보관 (float32 지표, 범주형 설비명, datetime64 시각)
+    - 열마다 따로 블록을 두므로(split_blocks) 어떤 순서로 열을 골라도 원본 배열을 그대로 가리킴
+    - window()는 복사 없이 잘라낸 뷰를 반환 (pandas 3의 Copy-on-Write로 수정하면 그때 복사됨)
+    - 저장소에 세그먼트만 추가되었으면 새 세그먼트만 읽어 이어 붙이고, 그 밖에 파일이 바뀌면 다시 읽음
+    - 전체 크기가 budget_bytes를 넘으면 가장 오래 쓰지 않은 모듈부터 버림
+    """
+
+    def __init__(self, budget_bytes=MEMORY_BUDGET_MB * 1024 * 1024, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+        self.budget_bytes = budget_bytes
+        self.csv_dir = csv_dir
+        self.store_dir = store_dir
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, module_id):
+        """
+        모듈 전체 DataFrame (공유 객체이므로 제자리 수정 금지)
+        """
+        path = ensure_store(module_id, self.csv_dir, self.store_dir)
+        signature = dataset_signature(path)
+        with self._lock:
+            entry = self._frames.get(module_id)
+            if entry is not None and entry[2] == signature:
+                self._frames.move_to_end(module_id)
+                self.hits += 1
+                count('module_cache.hit')
+                return entry[0]
+
+        if entry is not None and signature[:len(entry[2])] == entry[2]:
+            # 추가된 세그먼트만 읽음 (새 행은 항상 기존 마지막 시각 이후)
+            df = pd.concat([entry[0], read_files([p for p, _ in signature[len(entry[2]):]], split_blocks=True)], ignore_index=True)
+            if 'equipment' in df.columns and not isinstance(df['equipment'].dtype, pd.CategoricalDtype):
+                df['equipment'] = df['equipment'].astype('category')
+            count('module_cache.extend')
+        else:
+            df = read_window(path, split_blocks=True)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self.misses += 1
+            count('module_cache.miss')
+            self._frames[module_id] = (df, nbytes, signature)
+            self._frames.move_to_end(module_id)
+            self._evict()
+        return df
+
+    def _evict(self):
+        # 방금 읽은 모듈 하나는 한도를 넘더라도 남김
+        while len(self._frames) > 1 and self.nbytes() > self.budget_bytes:
+            self._frames.popitem(last=False)
+            self.evictions += 1
+
+    def nbytes(self):
+        return sum(entry[1] for entry in self._frames.values())
+
+    def window(self, module_id, columns=None, start=None, end=None):
+        """
+        [start, end) 구간과 지정 컬럼만 복사 없이 잘라 반환 (localtime은 항상 포함)
+        """
+        df = self.get(module_id)
+        ts = df['localtime']
+        lo = 0 if start is None else ts.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(df) if end is None else ts.searchsorted(pd.Timestamp(end), side='left')
+        view = df.iloc[lo:hi]
+        if columns is not None:
+            view = view[['localtime'] + [c for c in columns if c != 'localtime']]
+        return view
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'modules': len(self._frames),
+                'bytes': self.nbytes(),
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """
+    프로세스 전체에서 하나만 쓰는 ModuleCache (모든 페이지/세션 공유)
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModuleCache()
+        return _shared
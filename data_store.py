@@ -0,0 +1,489 @@
+import argparse
+import io
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features import add_derived
+from instrumentation import stage
+
+# 사용 가능한 모듈만 지정
+AVAILABLE_MODULES = [1, 2, 3, 4, 5, 11, 12, 13, 14, 15, 16, 17, 18]
+
+CSV_DIR = 'csv'
+STORE_DIR = 'store'
+ENCODINGS = ['utf-8-sig', 'utf-8', 'cp949', 'euc-kr']
+
+METRIC_COLUMNS = [
+    'voltageR', 'voltageS', 'voltageT',
+    'voltageRS', 'voltageST', 'voltageTR',
+    'currentR', 'currentS', 'currentT',
+    'activePower',
+    'powerFactorR', 'powerFactorS', 'powerFactorT',
+    'reactivePowerLagging',
+    'accumActiveEnergy',
+]
+# 누적 카운터는 float32로 줄이면 시간당 증분이 뭉개지므로 float64 유지
+COUNTER_COLUMNS = ['accumActiveEnergy']
+KEY_COLUMNS = ['module', 'equipment', 'localtime']
+
+ROW_GROUP_SIZE = 24 * 7
+# 저장소 스키마가 바뀌면 올려서 기존 파일을 다시 변환하게 함 (2: 파생 지표 추가)
+STORE_VERSION = 2
+# 추가 세그먼트 파일이 이보다 많아지면 기본 파일 하나로 합침 (읽을 때 여는 파일 수를 제한)
+MAX_SEGMENTS = 32
+
+_MODULE_RE = re.compile(r'^\s*(\d+)\s*\((.*)\)\s*$')
+
+# 저장소 파일별 잠금. 여러 세션이 같은 모듈을 동시에 변환/추가하지 않게 함 (재진입 가능)
+_STORE_LOCKS = {}
+
+
+def csv_path(module_id, csv_dir=CSV_DIR):
+    return os.path.join(csv_dir, f'resampled_module{module_id}.csv')
+
+
+def store_path(module_id, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f'module{module_id}.parquet')
+
+
+def module_lock(module_id, store_dir=STORE_DIR):
+    """
+    모듈 저장소 갱신(변환, 추가, 롤업/점수 갱신)을 직렬화하는 프로세스 내 잠금
+    """
+    key = os.path.abspath(store_path(module_id, store_dir))
+    return _STORE_LOCKS.setdefault(key, threading.RLock())
+
+
+def write_atomic(table, path, **kwargs):
+    """
+    같은 폴더의 고유한 임시 파일에 Parquet으로 쓴 뒤 교체 (동시에 쓰는 세션끼리 임시 파일이 겹치지 않음)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        tmp = f.name
+    try:
+        pq.write_table(table, tmp, **kwargs)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def segment_dir(path):
+    return path + '.segments'
+
+
+def _metadata(path):
+    return pq.read_schema(path).metadata or {}
+
+
+def _segments(path):
+    # (번호, 경로) 목록. 쓰는 중인 임시 파일(.tmp)은 제외
+    seg_dir = segment_dir(path)
+    if not os.path.isdir(seg_dir):
+        return []
+    return sorted((int(name.split('.')[0]), os.path.join(seg_dir, name))
+                  for name in os.listdir(seg_dir) if name.endswith('.parquet'))
+
+
+def _compacted_through(path):
+    return int(_metadata(path).get(b'compacted_through', b'-1')) if os.path.exists(path) else -1
+
+
+def _retry_missing(fn, attempts=3):
+    # 읽는 사이에 합치기로 세그먼트가 지워졌으면 파일 목록부터 다시 구함
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+
+def dataset_files(path):
+    """
+    기본 파일과 아직 합쳐지지 않은 추가 세그먼트 파일 목록 (오래된 순). 기본 파일이 없으면 빈 목록
+    """
+    if not os.path.exists(path):
+        return []
+    merged = _compacted_through(path)
+    return [path] + [p for seq, p in _segments(path) if seq > merged]
+
+
+def dataset_mtime(path):
+    return _retry_missing(lambda: max(os.path.getmtime(p) for p in dataset_files(path)))
+
+
+def dataset_signature(path):
+    """
+    ((파일, 수정 시각), ...) 튜플. 추가만 있었다면 이전 서명이 새 서명의 앞부분과 같음
+    """
+    return _retry_missing(lambda: tuple((p, os.path.getmtime(p)) for p in dataset_files(path)))
+
+
+def read_files(paths, columns=None, split_blocks=False):
+    """
+    저장소 파일 일부(예: 새로 생긴 세그먼트)만 순서대로 읽어 하나의 DataFrame으로 합침
+    """
+    with stage('store.read') as s:
+        tables = [pq.read_table(p, columns=columns) for p in paths]
+        table = pa.concat_tables(tables, promote_options='permissive')
+        s.set(rows=table.num_rows, nbytes=table.nbytes)
+        return table.to_pandas(split_blocks=split_blocks)
+
+
+def write_dataset(table, path, **kwargs):
+    """
+    전체를 기본 파일로 다시 쓰고 기존 세그먼트를 지움. 기본 파일에 합친 세그먼트 번호를 먼저 기록하므로
+    지우기 전에 읽는 쪽도 같은 행을 두 번 읽지 않음
+    """
+    last = max([_compacted_through(path)] + [seq for seq, _ in _segments(path)])
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'compacted_through'] = str(last).encode()
+    write_atomic(table.replace_schema_metadata(metadata), path, **kwargs)
+    for seq, p in _segments(path):
+        if seq <= last and os.path.exists(p):
+            os.remove(p)
+
+
+def append_segment(table, path, time_col='localtime', **kwargs):
+    """
+    추가분만 새 세그먼트 파일로 씀 (기존 파일은 다시 쓰지 않음)
+    세그먼트가 MAX_SEGMENTS개를 넘으면 기본 파일 하나로 합침
+    """
+    seq = max([_compacted_through(path)] + [s for s, _ in _segments(path)]) + 1
+    write_atomic(table, os.path.join(segment_dir(path), f'{seq:08d}.parquet'), **kwargs)
+    if len(dataset_files(path)) - 1 > MAX_SEGMENTS:
+        compact(path, time_col, **kwargs)
+
+
+def compact(path, time_col='localtime', **kwargs):
+    """
+    기본 파일과 세그먼트를 합쳐 기본 파일 하나로 다시 씀 (메타데이터는 마지막 세그먼트 값이 우선)
+    """
+    with stage('store.compact') as s:
+        files = dataset_files(path)
+        metadata = {**_metadata(files[0]), **_metadata(files[-1])}
+        table = pa.Table.from_pandas(read_window(path, time_col=time_col), preserve_index=False)
+        metadata[b'pandas'] = table.schema.metadata[b'pandas']
+        write_dataset(table.replace_schema_metadata(metadata), path, **kwargs)
+        s.set(rows=table.num_rows, nbytes=table.nbytes)
+
+
+def tail_rows(path, n=1, time_col='localtime'):
+    """
+    가장 늦은 n행 (마지막 파일의 마지막 row group부터 필요한 만큼만 읽음)
+    """
+    def read():
+        # 롤업 세그먼트는 직전 파일의 마지막 버킷을 다시 담으므로 서로 다른 시각이 n개가 될 때까지 읽음
+        parts, times = [], set()
+        for p in reversed(dataset_files(path)):
+            pf = pq.ParquetFile(p)
+            for i in reversed(range(pf.metadata.num_row_groups)):
+                parts.append(pf.read_row_group(i).to_pandas())
+                times.update(parts[-1][time_col])
+                if len(times) >= n:
+                    break
+            if len(times) >= n:
+                break
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat(parts[::-1], ignore_index=True)
+        return df.drop_duplicates(time_col, keep='last').tail(n).reset_index(drop=True)
+    return _retry_missing(read)
+
+
+def _detect_bytes_encoding(raw, name=''):
+    for enc in ENCODINGS:
+        try:
+            raw.decode(enc)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"CSV 파일 {name}을 열 수 없습니다.")
+
+
+def detect_encoding(path):
+    """
+    파일을 한 번만 읽어 디코딩 가능한 인코딩을 찾음 (CSV 재파싱 없이)
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return _detect_bytes_encoding(raw, path)
+
+
+def split_module_equipment(values):
+    """
+    '1(PM-3)' 형태의 문자열을 모듈 번호와 설비명으로 분리
+    """
+    parts = pd.Series(values, dtype='string').str.extract(_MODULE_RE)
+    module = pd.to_numeric(parts[0], errors='coerce').astype('Int16')
+    equipment = parts[1].astype('category')
+    return module, equipment
+
+
+def to_typed_frame(raw):
+    """
+    원본 CSV 프레임을 저장소 스키마(타임스탬프, float32 지표, 모듈/설비 분리)로 변환
+    """
+    df = pd.DataFrame(index=raw.index)
+    if 'module(equipment)' in raw.columns:
+        df['module'], df['equipment'] = split_module_equipment(raw['module(equipment)'])
+    df['localtime'] = pd.to_datetime(raw['localtime'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    if 'operation' in raw.columns:
+        df['operation'] = pd.to_numeric(raw['operation'], errors='coerce').astype('float32')
+    for col in METRIC_COLUMNS:
+        if col not in raw.columns:
+            continue
+        dtype = 'float64' if col in COUNTER_COLUMNS else 'float32'
+        df[col] = pd.to_numeric(raw[col], errors='coerce').astype(dtype)
+    df = df.dropna(subset=['localtime']).sort_values('localtime', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def _store_table(df, csv_offset, encoding, schema=None):
+    # 원본 CSV에서 어디까지 반영했는지(바이트 오프셋)와 인코딩을 스키마 메타데이터에 함께 기록
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    if schema is not None:
+        # 추가 세그먼트는 기본 파일과 같은 스키마로 맞춰 읽을 때 그대로 이어 붙일 수 있게 함
+        table = table.select(schema.names).cast(schema.remove_metadata())
+    metadata[b'csv_offset'] = str(csv_offset).encode()
+    metadata[b'csv_encoding'] = encoding.encode()
+    metadata[b'store_version'] = str(STORE_VERSION).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _write_store(df, dst, csv_offset, encoding):
+    write_dataset(_store_table(df, csv_offset, encoding), dst, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+
+
+def store_version(path):
+    return int(_metadata(path).get(b'store_version', b'1'))
+
+
+def store_offset(path):
+    """
+    저장소에 반영된 원본 CSV 바이트 오프셋과 인코딩 (마지막 세그먼트 기준). 기록이 없으면 (None, None)
+    """
+    metadata = _retry_missing(lambda: _metadata(dataset_files(path)[-1]))
+    if b'csv_offset' not in metadata:
+        return None, None
+    return int(metadata[b'csv_offset']), metadata[b'csv_encoding'].decode()
+
+
+def ingest_module(module_id, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    resampled_moduleN.csv 하나를 Parquet 저장소로 변환하고 저장 경로 반환
+    """
+    with module_lock(module_id, store_dir):
+        src = csv_path(module_id, csv_dir)
+        with stage('store.ingest') as s:
+            with open(src, 'rb') as f:
+                data = f.read()
+            encoding = _detect_bytes_encoding(data, src)
+            df = add_derived(to_typed_frame(pd.read_csv(io.BytesIO(data), encoding=encoding)))
+
+            dst = store_path(module_id, store_dir)
+            _write_store(df, dst, len(data), encoding)
+            s.set(rows=len(df), nbytes=len(data))
+        return dst
+
+
+def append_new_rows(module_id, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    원본 CSV에서 마지막으로 반영한 오프셋 이후에 추가된 완전한 줄만 읽어 저장소 뒤에 붙이고 새 행 반환
+    (추가분이 없거나 마지막 줄이 아직 쓰이는 중이면 빈 DataFrame)
+    파일이 줄었거나 제자리에서 바뀌었거나 오프셋 기록이 없으면 전체를 다시 변환하고 None 반환
+    추가된 줄이 이미 저장된 시각 이전이면(늦게 도착한 행) 합쳐서 다시 쓰고 마찬가지로 None 반환
+    """
+    with module_lock(module_id, store_dir):
+        src, dst = csv_path(module_id, csv_dir), store_path(module_id, store_dir)
+        if not os.path.exists(dst):
+            ingest_module(module_id, csv_dir, store_dir)
+            return None
+        if not os.path.exists(src):
+            return pd.DataFrame()
+
+        offset, encoding = store_offset(dst)
+        size = os.path.getsize(src)
+        stale = offset is None or store_version(dst) != STORE_VERSION
+        if stale or size < offset or (size == offset and os.path.getmtime(src) > dataset_mtime(dst)):
+            ingest_module(module_id, csv_dir, store_dir)
+            return None
+        if size == offset:
+            return pd.DataFrame()
+
+        with open(src, 'rb') as f:
+            header = f.readline()
+            f.seek(offset)
+            data = f.read(size - offset)
+        complete = data.rfind(b'\n') + 1
+        if complete == 0:
+            return pd.DataFrame()
+
+        with stage('store.append', nbytes=complete) as s:
+            typed = to_typed_frame(pd.read_csv(io.BytesIO(header + data[:complete]), encoding=encoding))
+            end, schema = store_end(dst), pq.read_schema(dst)
+            times = typed['localtime']
+            if len(typed) and times.is_unique and (end is None or times.iloc[0] > end):
+                # 새 행이 모두 저장된 마지막 시각 이후면 추가분만 세그먼트로 씀 (기존 파일은 그대로)
+                last = tail_rows(dst, 1)
+                prev_energy = last['accumActiveEnergy'].iloc[-1] if len(last) and 'accumActiveEnergy' in last else np.nan
+                new_rows = add_derived(typed, prev_energy)
+                if set(new_rows.columns) == set(schema.names):
+                    append_segment(_store_table(new_rows, offset + complete, encoding, schema), dst,
+                                   row_group_size=ROW_GROUP_SIZE, compression='zstd')
+                    s.set(rows=len(new_rows))
+                    return new_rows
+
+            # 이미 저장된 시각을 고치거나 중간에 끼워 넣는 행, 열 구성이 다른 행이면 전체를 합쳐 다시 씀
+            # 끼워 넣은 행 뒤의 구간 에너지도 바뀌므로 파생 지표는 합친 뒤 처음부터 다시 계산
+            df = pd.concat([read_window(dst), typed], ignore_index=True)
+            df = df.drop_duplicates('localtime', keep='last').sort_values('localtime', kind='stable')
+            if 'equipment' in df.columns:
+                df['equipment'] = df['equipment'].astype('category')
+            _write_store(add_derived(df.reset_index(drop=True)), dst, offset + complete, encoding)
+            s.set(rows=len(typed))
+        # 뒤에 붙인 것이 아니므로 롤업/점수도 전체를 다시 만들도록 None 반환
+        return None
+
+
+def ingest_all(modules=None, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    modules = AVAILABLE_MODULES if modules is None else modules
+    return {m: ingest_module(m, csv_dir, store_dir) for m in modules}
+
+
+def ensure_store(module_id, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    저장소 파일이 없으면 변환하고, 원본 CSV가 더 새로우면 뒤에 추가된 행만 반영
+    (추가가 아닌 변경이면 append_new_rows가 전체를 다시 변환)
+    """
+    dst = store_path(module_id, store_dir)
+    src = csv_path(module_id, csv_dir)
+
+    def stale():
+        return not os.path.exists(dst) or store_version(dst) != STORE_VERSION
+
+    def behind():
+        return os.path.exists(src) and os.path.getmtime(src) > dataset_mtime(dst)
+
+    if not stale() and not behind():
+        return dst
+    # 잠금을 기다리는 동안 다른 세션이 이미 갱신했을 수 있으므로 다시 확인
+    with module_lock(module_id, store_dir):
+        if stale():
+            return ingest_module(module_id, csv_dir, store_dir)
+        if behind():
+            append_new_rows(module_id, csv_dir, store_dir)
+    return dst
+
+
+def _to_timestamp(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+def row_groups_in_range(pf, start=None, end=None, time_col='localtime'):
+    """
+    row group별 time_col min/max 통계로 [start, end) 구간과 겹치는 row group 번호만 반환
+    """
+    start, end = _to_timestamp(start), _to_timestamp(end)
+    ts_index = pf.metadata.schema.names.index(time_col)
+    groups = []
+    for i in range(pf.metadata.num_row_groups):
+        stats = pf.metadata.row_group(i).column(ts_index).statistics
+        if stats is None or not stats.has_min_max:
+            groups.append(i)
+            continue
+        if start is not None and pd.Timestamp(stats.max) < start:
+            continue
+        if end is not None and pd.Timestamp(stats.min) >= end:
+            continue
+        groups.append(i)
+    return groups
+
+
+def store_end(path, time_col='localtime'):
+    """
+    마지막 파일의 마지막 row group 통계로 저장된 가장 늦은 시각을 구함 (데이터를 읽지 않음)
+    """
+    def read():
+        for p in reversed(dataset_files(path)):
+            metadata = pq.ParquetFile(p).metadata
+            if metadata.num_row_groups == 0:
+                continue
+            last = metadata.row_group(metadata.num_row_groups - 1)
+            stats = last.column(metadata.schema.names.index(time_col)).statistics
+            return pd.Timestamp(stats.max) if stats is not None and stats.has_min_max else None
+        return None
+    return _retry_missing(read)
+
+
+def _read_tables(path, columns, start, end, time_col):
+    tables = []
+    for p in dataset_files(path):
+        pf = pq.ParquetFile(p)
+        if start is None and end is None:
+            tables.append(pf.read(columns=columns))
+        else:
+            tables.append(pf.read_row_groups(row_groups_in_range(pf, start, end, time_col), columns=columns))
+    return tables
+
+
+def read_window(path, columns=None, start=None, end=None, time_col='localtime', split_blocks=False):
+    """
+    time_col로 정렬된 저장소(기본 파일 + 추가 세그먼트)에서 [start, end) 구간과 겹치는 row group만 읽은 뒤
+    정렬된 시각으로 경계를 자름. 여러 파일에 같은 시각이 있으면 나중에 쓴 행을 씀
+    split_blocks=True면 열마다 따로 메모리 블록을 둠 (임의 순서의 열 선택도 복사 없는 뷰가 됨)
+    """
+    with stage('store.read') as s:
+        tables = _retry_missing(lambda: _read_tables(path, columns, start, end, time_col))
+        table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+        df = table.to_pandas(split_blocks=split_blocks)
+        if len(tables) > 1 and time_col in df:
+            df = df.drop_duplicates(time_col, keep='last', ignore_index=True)
+        if start is None and end is None:
+            s.set(rows=len(df), nbytes=table.nbytes)
+            return df
+
+        # 시각은 저장 시 정렬되어 있으므로 이진 탐색으로 경계만 자름
+        ts = df[time_col]
+        lo = 0 if start is None else ts.searchsorted(_to_timestamp(start), side='left')
+        hi = len(df) if end is None else ts.searchsorted(_to_timestamp(end), side='left')
+        s.set(rows=hi - lo, nbytes=table.nbytes)
+        return df.iloc[lo:hi].reset_index(drop=True)
+
+
+def load_module(module_id, columns=None, start=None, end=None, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    저장소에서 모듈 데이터를 읽음. columns를 주면 해당 지표만 읽음 (localtime은 항상 포함)
+    """
+    path = ensure_store(module_id, csv_dir, store_dir)
+    if columns is not None:
+        columns = ['localtime'] + [c for c in columns if c != 'localtime']
+    return read_window(path, columns, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 CSV를 Parquet 저장소로 변환")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--csv-dir', default=CSV_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    for module_id in args.modules:
+        dst = ingest_module(module_id, args.csv_dir, args.store_dir)
+        print(f"module{module_id}: {pq.ParquetFile(dst).metadata.num_rows}행 → {dst}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import functools
+import json
+
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+from data_service import shared_cache
+
+STAGE_LABELS = {'stage': '단계', 'calls': '호출', 'ms': '소요(ms)', 'rows': '행', 'bytes': '바이트'}
+
+
+def requested():
+    # 환경변수(APP_DIAGNOSTICS=1) 또는 주소 뒤 ?diagnostics=1 로 켬
+    return instrumentation.ENABLED or st.query_params.get('diagnostics') == '1'
+
+
+def start_page(page):
+    """
+    진단이 켜져 있으면 이번 페이지 실행의 계측을 시작하고 Trace 반환 (꺼져 있으면 None)
+    페이지는 본문을 try/finally로 감싸 중단(재실행, st.stop, 예외)되어도 show_diagnostics를 부름
+    """
+    if not requested():
+        instrumentation.clear_run()
+        return None
+    return instrumentation.start_run(page)
+
+
+def _hit_rate(events, name):
+    hits, misses = events.get(f'{name}.hit', 0), events.get(f'{name}.miss', 0)
+    return f"{hits}/{hits + misses}" if hits + misses else "-"
+
+
+def _render(record, key):
+    if record['stages']:
+        stages = pd.DataFrame(record['stages'])
+        stages['ms'] = (stages.pop('seconds') * 1000).round(1)
+        st.dataframe(stages[list(STAGE_LABELS)].rename(columns=STAGE_LABELS),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.caption("기록된 단계가 없습니다.")
+
+    st.caption(f"이번 실행 캐시 적중: 모듈 {_hit_rate(record['events'], 'module_cache')} · "
+               f"예측 {_hit_rate(record['events'], 'prediction_cache')}")
+    st.download_button("JSON 내려받기", json.dumps(record, ensure_ascii=False, indent=2),
+                       file_name="diagnostics.json", mime="application/json", key=f"{key}-json")
+
+
+def show_diagnostics(trace):
+    """
+    계측을 닫고(내보내기 포함) 사이드바에 단계별 소요 시간, 캐시 적중률, 내보내기 버튼을 표시
+    fragment 실행은 traced_fragment가 따로 계측해 각 fragment 아래에 표시
+    """
+    if trace is None:
+        return
+    record = instrumentation.finish_run(trace)
+    with st.sidebar.expander(f"🩺 진단 · {record['total_s'] * 1000:,.0f} ms", expanded=False):
+        _render(record, 'diagnostics')
+        cache = shared_cache().stats()
+        st.caption(f"공유 모듈 캐시: {cache['modules']}개 모듈, {cache['bytes'] / 1e6:,.1f} / "
+                   f"{cache['budget_bytes'] / 1e6:,.0f} MB, 누적 적중 {cache['hits']} / 실패 {cache['misses']}")
+        st.caption("슬라이더·실시간 갱신처럼 fragment만 다시 실행된 부분은 해당 영역 아래 진단에 따로 표시됩니다.")
+        st.download_button("Prometheus 텍스트 내려받기", instrumentation.prometheus_text(),
+                           file_name="app.prom", mime="text/plain")
+
+
+def traced_fragment(name):
+    """
+    @st.fragment 아래에 붙이는 데코레이터. fragment 실행마다(단독 재실행 포함) 별도 Trace로 계측해 내보내고
+    fragment 안에 결과를 표시 (fragment는 사이드바에 쓸 수 없음). 끝나면 페이지 Trace로 되돌림
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if not requested():
+                return fn(*args, **kwargs)
+            trace = instrumentation.start_run(name, nested=True)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record = instrumentation.finish_run(trace)
+                with st.expander(f"🩺 진단 · {name} · {record['total_s'] * 1000:,.0f} ms", expanded=False):
+                    _render(record, f'diagnostics-{name}')
+        return run
+    return decorate
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# wide 레이아웃 차트의 대략적인 가로 픽셀 수
+DEFAULT_POINTS = 1200
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(y, n_out):
+    """
+    n_out//2개 버킷마다 최솟값/최댓값 위치를 골라 스파이크가 유지되도록 인덱스 반환
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(y))
+    n = len(valid)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return valid
+
+    yv = y[valid]
+    bounds = np.arange(n_buckets + 1) * n // n_buckets
+    counts = np.diff(bounds)
+    bucket = np.repeat(np.arange(n_buckets), counts)
+
+    picks = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(yv, bounds[:-1]), counts)
+        hit = np.flatnonzero(yv == extreme)
+        # 같은 버킷에 극값이 여러 개면 첫 번째만 사용
+        first = np.r_[True, np.diff(bucket[hit]) != 0]
+        picks.append(hit[first])
+    return valid[np.unique(np.concatenate(picks))]
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 알고리즘으로 n_out개 인덱스 선택
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(y))
+    n = len(valid)
+    if n <= n_out or n_out < 3:
+        return valid
+    xv, yv = x[valid], y[valid]
+
+    # 첫/마지막 점은 고정, 나머지를 n_out-2개 버킷으로 분할
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picks = np.empty(n_out, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = xv[nxt_lo:nxt_hi].mean()
+        avg_y = yv[nxt_lo:nxt_hi].mean()
+        area = np.abs((xv[a] - avg_x) * (yv[lo:hi] - yv[a]) - (xv[a] - xv[lo:hi]) * (avg_y - yv[a]))
+        a = lo + int(np.argmax(area))
+        picks[i + 1] = a
+    return valid[picks]
+
+
+def downsample_indices(x, y, n_out=DEFAULT_POINTS, method='minmax'):
+    """
+    차트에 남길 행 위치를 반환. method: 'minmax' 또는 'lttb'
+    """
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    raise ValueError(f"지원하지 않는 다운샘플링 방식입니다: {method}")
+
+
+def downsample_series(x, y, n_out=DEFAULT_POINTS, method='minmax'):
+    """
+    한 시계열을 차트 픽셀 폭 정도로 줄여 (x, y) 반환
+    """
+    x = x.to_numpy() if isinstance(x, (pd.Series, pd.Index)) else np.asarray(x)
+    y = y.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(y, pd.Series) else np.asarray(y, dtype=np.float64)
+    idx = downsample_indices(x, y, n_out, method)
+    return x[idx], y[idx]
@@ -0,0 +1,60 @@
+import numpy as np
+
+# 저장 시점에 한 번 계산해 원본 지표 옆에 함께 보관하는 파생 지표
+DERIVED_COLUMNS = [
+    'currentImbalance',
+    'voltageImbalance',
+    'apparentPower',
+    'powerFactorMean',
+    'intervalEnergy',
+]
+PHASE_CURRENTS = ['currentR', 'currentS', 'currentT']
+PHASE_VOLTAGES = ['voltageR', 'voltageS', 'voltageT']
+PHASE_POWER_FACTORS = ['powerFactorR', 'powerFactorS', 'powerFactorT']
+
+
+def phase_imbalance(values):
+    """
+    (행 × 3상) 배열의 불평형률(%) = 평균 대비 최대 편차 / 평균 × 100
+    """
+    mean = values.mean(axis=1)
+    dev = np.abs(values - mean[:, None]).max(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(mean > 0, dev / mean * 100, np.nan)
+
+
+def _matrix(df, columns):
+    return np.column_stack([df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns])
+
+
+def compute_derived(df, prev_energy=np.nan):
+    """
+    파생 지표를 NumPy 벡터 연산으로 계산해 {컬럼: float32 배열} 반환
+    - currentImbalance / voltageImbalance: 3상 전류/상전압 불평형률(%)
+    - apparentPower: 유효/무효전력으로 구한 피상전력 sqrt(P² + Q²)
+    - powerFactorMean: 3상 역률 평균
+    - intervalEnergy: accumActiveEnergy 직전 행과의 차분 (카운터 리셋으로 음수면 0)
+    prev_energy: 첫 행 직전의 누적 에너지 (저장소 뒤에 이어 붙일 때 사용)
+    """
+    active = df['activePower'].to_numpy(dtype=np.float64, na_value=np.nan)
+    reactive = df['reactivePowerLagging'].to_numpy(dtype=np.float64, na_value=np.nan)
+    energy = df['accumActiveEnergy'].to_numpy(dtype=np.float64, na_value=np.nan)
+    derived = {
+        'currentImbalance': phase_imbalance(_matrix(df, PHASE_CURRENTS)),
+        'voltageImbalance': phase_imbalance(_matrix(df, PHASE_VOLTAGES)),
+        'apparentPower': np.hypot(active, reactive),
+        'powerFactorMean': _matrix(df, PHASE_POWER_FACTORS).mean(axis=1),
+        'intervalEnergy': np.clip(np.diff(energy, prepend=prev_energy), 0, None),
+    }
+    return {col: values.astype(np.float32) for col, values in derived.items()}
+
+
+def add_derived(df, prev_energy=np.nan):
+    """
+    원본 지표가 모두 있을 때 파생 지표 컬럼을 붙여 반환 (없으면 그대로)
+    """
+    required = PHASE_CURRENTS + PHASE_VOLTAGES + PHASE_POWER_FACTORS + [
+        'activePower', 'reactivePowerLagging', 'accumActiveEnergy']
+    if len(df) == 0 or not all(col in df.columns for col in required):
+        return df
+    return df.assign(**compute_derived(df, prev_energy))
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from anomaly_engine import ANOMALY_THRESHOLD, scores_path, score_module
+from data_store import AVAILABLE_MODULES, STORE_DIR, dataset_files, ensure_store, read_window
+
+FLEET_COLUMNS = [
+    'module', 'equipment', 'localtime',
+    'activePower',
+    # 저장 시점에 계산된 파생 지표
+    'powerFactorMean', 'currentImbalance', 'voltageImbalance',
+]
+
+
+def _window_filter(start, end, field='localtime'):
+    expr = None
+    if start is not None:
+        expr = ds.field(field) >= pd.Timestamp(start)
+    if end is not None:
+        cond = ds.field(field) < pd.Timestamp(end)
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def load_fleet(start=None, end=None, columns=FLEET_COLUMNS, modules=None, store_dir=STORE_DIR):
+    """
+    모든 모듈 저장소를 하나의 데이터셋으로 묶어 [start, end) 구간을 한 번에 읽음
+    (row group 통계로 구간 밖 데이터는 읽지 않음)
+    """
+    modules = AVAILABLE_MODULES if modules is None else modules
+    # 모듈마다 기본 파일과 아직 합쳐지지 않은 추가 세그먼트를 모두 포함
+    paths = [p for m in modules for p in dataset_files(ensure_store(m, store_dir=store_dir))]
+    table = ds.dataset(paths, format='parquet').to_table(columns=columns, filter=_window_filter(start, end))
+    df = table.to_pandas()
+    # 모듈별 파일을 합쳤으므로 설비명 카테고리를 하나로 통일
+    if 'equipment' in df.columns:
+        df['equipment'] = df['equipment'].astype(str).astype('category')
+    return df
+
+
+def load_fleet_scores(start=None, end=None, modules=None, store_dir=STORE_DIR):
+    """
+    모든 모듈의 이상치 점수 [start, end) 구간을 module 컬럼을 붙여 하나로 합침
+    """
+    modules = AVAILABLE_MODULES if modules is None else modules
+    parts = []
+    for m in modules:
+        if not os.path.exists(scores_path(m, store_dir)):
+            score_module(m, store_dir=store_dir)
+        part = read_window(scores_path(m, store_dir), ['timestamp', 'total_error'], start, end, time_col='timestamp')
+        part['module'] = np.int16(m)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def fleet_summary(df, scores, threshold=ANOMALY_THRESHOLD):
+    """
+    모듈별 평균 유효전력, 평균 역률, 평균 전류/전압 불평형률, 이상치 수를 한 번의 groupby로 계산
+    (역률 평균과 불평형률은 저장소의 파생 지표를 그대로 사용)
+    """
+    summary = df.groupby('module', observed=True).agg(
+        activePower_mean=('activePower', 'mean'),
+        activePower_max=('activePower', 'max'),
+        powerFactor_mean=('powerFactorMean', 'mean'),
+        currentImbalance_mean=('currentImbalance', 'mean'),
+        voltageImbalance_mean=('voltageImbalance', 'mean'),
+        rows=('activePower', 'size'),
+    )
+    equipment = df.groupby('module', observed=True)['equipment'].first().astype(str)
+    anomalies = (scores['total_error'] > threshold).groupby(scores['module']).sum()
+    summary.insert(0, 'equipment', equipment)
+    summary['anomalies'] = anomalies.reindex(summary.index, fill_value=0).astype(int)
+    return summary.reset_index()
+
+
+def hourly_heatmap(df, value='activePower', by_hour_of_day=True):
+    """
+    모듈 × 시간 평균값 피벗 테이블. by_hour_of_day=True면 0~23시 시간대별로 접어서 집계
+    """
+    hours = df['localtime'].dt.hour if by_hour_of_day else df['localtime'].dt.floor('h')
+    return df.pivot_table(index='module', columns=hours.rename('hour'), values=value, aggfunc='mean', observed=True)
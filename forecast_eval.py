@@ -0,0 +1,175 @@
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, detect_encoding
+
+GROUND_TRUTH_PATH = os.path.join('csv', 'rtu_ground_truth_may.csv')
+TARGETS = ['hourly_pow', 'may_bill', 'may_carbon', 'agg_pow']
+# 예측 시작 시각부터 몇 시간 뒤인지로 나눈 구간 (시작 이상, 끝 미만)
+HORIZON_EDGES = [0, 24, 72, 168]
+HORIZON_LABELS = ['1-24h', '25-72h', '73-168h', '169h+']
+ALL_HORIZONS = 'all'
+
+
+def runs_dir(store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'forecast_runs')
+
+
+def run_path(run_id, store_dir=STORE_DIR):
+    return os.path.join(runs_dir(store_dir), f'{run_id}.parquet')
+
+
+def metrics_path(run_id, store_dir=STORE_DIR):
+    return os.path.join(runs_dir(store_dir), f'{run_id}_metrics.parquet')
+
+
+def load_ground_truth(path=GROUND_TRUTH_PATH):
+    df = pd.read_csv(path, encoding=detect_encoding(path))
+    df['id'] = pd.to_datetime(df['id'])
+    return df
+
+
+def to_prediction_frame(result):
+    """
+    엔드포인트 응답(DataFrame, 레코드 리스트, 컬럼별 리스트 dict)을 id + 지표 DataFrame으로 변환
+    평가할 수 없는 형태면 None
+    """
+    if isinstance(result, pd.DataFrame):
+        df = result
+    elif isinstance(result, list) and result and all(isinstance(r, dict) for r in result):
+        df = pd.DataFrame.from_records(result)
+    elif isinstance(result, dict) and all(isinstance(v, list) for v in result.values()):
+        df = pd.DataFrame(result)
+    else:
+        return None
+    targets = [c for c in TARGETS if c in df.columns]
+    if 'id' not in df.columns or not targets:
+        return None
+    df = df[['id'] + targets].copy()
+    df['id'] = pd.to_datetime(df['id'])
+    for col in targets:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def combine_duplicate_ids(pred):
+    """
+    모듈별 청크 응답처럼 같은 id가 여러 번 나오면 전체 합계로 합침
+    hourly_pow/may_bill/may_carbon은 id별 합, agg_pow는 합친 hourly_pow의 전체 구간 합으로 다시 계산
+    """
+    if not pred['id'].duplicated().any():
+        return pred
+    targets = [c for c in TARGETS if c in pred.columns]
+    combined = pred.groupby('id', sort=True)[[c for c in targets if c != 'agg_pow']].sum(min_count=1).reset_index()
+    if 'agg_pow' in targets:
+        if 'hourly_pow' not in combined.columns:
+            raise ValueError("id가 중복된 예측에서 agg_pow를 다시 계산하려면 hourly_pow가 필요합니다.")
+        combined['agg_pow'] = combined['hourly_pow'].sum()
+    return combined[['id'] + targets]
+
+
+def evaluate(pred, truth, start=None):
+    """
+    예측과 정답을 id(시간)로 맞춘 뒤 모든 지표를 한 번에 평가
+    start: 예측 시작 시각 (기본: 예측의 첫 id). horizon은 정답과 맞은 첫 시각이 아니라 여기서부터 셈
+    반환: (aligned, metrics)
+    - aligned: id, horizon(시간), {지표}_pred, {지표}_true, {지표}_cum_error (누적 오차)
+    - metrics: 지표 × 구간(all, 1-24h, ...)별 n, MAE, RMSE, MAPE(%), bias
+    """
+    targets = [c for c in TARGETS if c in pred.columns and c in truth.columns]
+    pred = combine_duplicate_ids(pred)
+    start = pred['id'].min() if start is None else pd.Timestamp(start)
+    aligned = pd.merge(
+        pred[['id'] + targets],
+        truth[['id'] + targets],
+        on='id', how='inner', sort=True, suffixes=('_pred', '_true'),
+    )
+    P = aligned[[f'{c}_pred' for c in targets]].to_numpy(dtype=np.float64, na_value=np.nan)
+    T = aligned[[f'{c}_true' for c in targets]].to_numpy(dtype=np.float64, na_value=np.nan)
+    E = P - T
+    valid = ~np.isnan(E)
+
+    hours = ((aligned['id'] - start) / pd.Timedelta(hours=1)).to_numpy() if len(aligned) else np.zeros(0)
+    aligned.insert(1, 'horizon', hours)
+    for j, col in enumerate(targets):
+        aligned[f'{col}_cum_error'] = np.cumsum(np.where(valid[:, j], E[:, j], 0.0))
+
+    # 구간 0은 전체, 1..은 horizon 구간. 한 번의 bincount로 (구간, 지표)별 합계를 구함
+    bucket = np.searchsorted(HORIZON_EDGES, hours, side='right')
+    n_buckets = len(HORIZON_LABELS) + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = np.where(valid & (T != 0), np.abs(E / T), np.nan)
+    sums = {}
+    for name, values, mask in (
+        ('n', np.ones_like(E), valid),
+        ('abs', np.abs(E), valid),
+        ('sq', E ** 2, valid),
+        ('err', E, valid),
+        ('ape', ape, ~np.isnan(ape)),
+        ('ape_n', np.ones_like(E), ~np.isnan(ape)),
+    ):
+        v = np.where(mask, values, 0.0)
+        per_bucket = np.stack([np.bincount(bucket, weights=v[:, j], minlength=n_buckets) for j in range(len(targets))], axis=1)
+        per_bucket[0] = v.sum(axis=0)
+        sums[name] = per_bucket
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = sums['n']
+        metrics = pd.DataFrame({
+            'target': np.tile(targets, n_buckets),
+            'horizon': np.repeat([ALL_HORIZONS] + HORIZON_LABELS, len(targets)),
+            'n': n.ravel().astype(int),
+            'mae': (sums['abs'] / n).ravel(),
+            'rmse': np.sqrt(sums['sq'] / n).ravel(),
+            'mape': (sums['ape'] / sums['ape_n'] * 100).ravel(),
+            'bias': (sums['err'] / n).ravel(),
+        })
+    return aligned, metrics[metrics['n'] > 0].reset_index(drop=True)
+
+
+def new_run_id(now=None, store_dir=STORE_DIR):
+    """
+    마이크로초까지 포함한 실행 id. 같은 id의 결과가 이미 있으면 번호를 붙여 덮어쓰지 않음
+    """
+    base = (now or datetime.now()).strftime('%Y%m%d-%H%M%S-%f')
+    run_id, n = base, 1
+    while os.path.exists(metrics_path(run_id, store_dir)):
+        run_id, n = f'{base}-{n}', n + 1
+    return run_id
+
+
+def save_run(pred, truth=None, run_id=None, model_version='', start=None, store_dir=STORE_DIR):
+    """
+    예측 실행 하나를 평가해 정렬된 결과와 지표를 저장. 이후 비교 시 다시 계산하지 않음
+    """
+    truth = load_ground_truth() if truth is None else truth
+    run_id = run_id or new_run_id(store_dir=store_dir)
+    aligned, metrics = evaluate(pred, truth, start)
+    metrics.insert(0, 'run_id', run_id)
+    metrics['model_version'] = model_version
+    metrics['created_at'] = pd.Timestamp.now()
+
+    os.makedirs(runs_dir(store_dir), exist_ok=True)
+    aligned.to_parquet(run_path(run_id, store_dir), index=False)
+    metrics.to_parquet(metrics_path(run_id, store_dir), index=False)
+    return run_id, aligned, metrics
+
+
+def list_runs(store_dir=STORE_DIR):
+    """
+    저장된 모든 실행의 지표를 하나의 DataFrame으로 (최신 실행이 먼저)
+    """
+    paths = glob.glob(os.path.join(runs_dir(store_dir), '*_metrics.parquet'))
+    if not paths:
+        return pd.DataFrame(columns=['run_id', 'target', 'horizon', 'n', 'mae', 'rmse', 'mape', 'bias',
+                                     'model_version', 'created_at'])
+    runs = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+    return runs.sort_values(['created_at', 'run_id'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def load_run(run_id, store_dir=STORE_DIR):
+    return pd.read_parquet(run_path(run_id, store_dir))
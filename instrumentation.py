@@ -0,0 +1,226 @@
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# APP_DIAGNOSTICS=1이면 모든 페이지 실행을 계측 (꺼져 있으면 stage/count는 아무 일도 하지 않음)
+ENABLED = os.environ.get('APP_DIAGNOSTICS', '') not in ('', '0')
+METRICS_DIR = os.environ.get('APP_DIAGNOSTICS_DIR', os.path.join('store', 'metrics'))
+# 한 실행에 기록할 최대 단계 수 (반복문 안의 stage 호출로 기록이 끝없이 커지는 것을 막음)
+MAX_STAGES = 1000
+
+_current = contextvars.ContextVar('trace', default=None)
+_totals_lock = threading.Lock()
+# (페이지, 단계) → [호출 수, 초, 행, 바이트] / (페이지, 이벤트) → 횟수 / 페이지 → [실행 수, 초]
+_stage_totals = {}
+_event_totals = {}
+_page_totals = {}
+
+
+class Trace:
+    """
+    페이지 실행 한 번의 단계별 소요 시간, 행/바이트 수와 캐시 적중 같은 이벤트 횟수
+    """
+
+    def __init__(self, page, parent=None):
+        self.page = page
+        # 끝나면 되돌릴 바깥 Trace (fragment 실행을 페이지 실행 안에서 따로 계측할 때)
+        self.parent = parent
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.total = None
+        self.stages = []
+        self.events = {}
+
+    def add(self, stage, seconds, rows=None, nbytes=None):
+        if len(self.stages) < MAX_STAGES:
+            # NumPy 정수(searchsorted 결과 등)도 JSON으로 내보낼 수 있게 int로 바꿈
+            self.stages.append((stage, seconds, None if rows is None else int(rows), None if nbytes is None else int(nbytes)))
+
+    def count(self, event, n=1):
+        self.events[event] = self.events.get(event, 0) + n
+
+    def summary(self):
+        """
+        단계별 합계 [{stage, calls, seconds, rows, bytes}] (처음 나온 순서)
+        """
+        out = {}
+        for stage, seconds, rows, nbytes in self.stages:
+            entry = out.setdefault(stage, {'stage': stage, 'calls': 0, 'seconds': 0.0, 'rows': None, 'bytes': None})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            if rows is not None:
+                entry['rows'] = (entry['rows'] or 0) + rows
+            if nbytes is not None:
+                entry['bytes'] = (entry['bytes'] or 0) + nbytes
+        return list(out.values())
+
+    def record(self):
+        return {
+            'page': self.page,
+            'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'total_s': round(self.total if self.total is not None else time.perf_counter() - self.started, 6),
+            'stages': [dict(s, seconds=round(s['seconds'], 6)) for s in self.summary()],
+            'events': dict(self.events),
+        }
+
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'rows', 'nbytes', 'started')
+
+    def __init__(self, trace, name, rows, nbytes):
+        self.trace = trace
+        self.name = name
+        self.rows = rows
+        self.nbytes = nbytes
+
+    def set(self, rows=None, nbytes=None):
+        # 처리 후에야 알 수 있는 행/바이트 수를 기록
+        if rows is not None:
+            self.rows = rows
+        if nbytes is not None:
+            self.nbytes = nbytes
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.started, self.rows, self.nbytes)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def set(self, rows=None, nbytes=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, rows=None, nbytes=None):
+    """
+    with stage('store.read') as s: ...; s.set(rows=len(df))
+    계측 중인 실행이 없으면 공유 no-op 객체를 돌려주므로 비용은 ContextVar 조회 한 번
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_STAGE
+    return _Stage(trace, name, rows, nbytes)
+
+
+def count(event, n=1):
+    trace = _current.get()
+    if trace is not None:
+        trace.count(event, n)
+
+
+def start_run(page, nested=False):
+    """
+    현재 스크립트 실행(스레드/컨텍스트)에 새 Trace를 연결. 이후 같은 실행의 stage/count가 여기에 기록됨
+    nested=True면 끝날 때 바깥 Trace로 되돌림 (fragment)
+    """
+    trace = Trace(page, _current.get() if nested else None)
+    _current.set(trace)
+    return trace
+
+
+def clear_run():
+    """
+    현재 실행에 연결된 Trace를 떼어 냄. Streamlit은 세션의 재실행마다 같은 스레드를 쓰므로
+    끝나지 못한 이전 실행의 Trace가 남아 있으면 이후 stage/count가 거기에 계속 쌓임
+    """
+    _current.set(None)
+
+
+def finish_run(trace, export=True):
+    """
+    Trace를 닫고 프로세스 누적값에 합침. export=True면 JSON Lines와 Prometheus 텍스트 파일에 기록
+    반환: trace.record()
+    """
+    if _current.get() is trace:
+        _current.set(trace.parent)
+    trace.total = time.perf_counter() - trace.started
+    record = trace.record()
+    with _totals_lock:
+        runs = _page_totals.setdefault(trace.page, [0, 0.0])
+        runs[0] += 1
+        runs[1] += trace.total
+        for entry in record['stages']:
+            totals = _stage_totals.setdefault((trace.page, entry['stage']), [0, 0.0, 0, 0])
+            totals[0] += entry['calls']
+            totals[1] += entry['seconds']
+            totals[2] += entry['rows'] or 0
+            totals[3] += entry['bytes'] or 0
+        for event, n in record['events'].items():
+            _event_totals[(trace.page, event)] = _event_totals.get((trace.page, event), 0) + n
+    if export:
+        append_jsonl(record)
+        write_prometheus()
+    return record
+
+
+def append_jsonl(record, path=None):
+    path = path or os.path.join(METRICS_DIR, 'runs.jsonl')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """
+    프로세스 시작 이후 누적값을 Prometheus 텍스트 형식으로 반환
+    """
+    metrics = [
+        ('app_page_runs_total', '계측된 페이지 실행 수', 'page', _page_totals, 0),
+        ('app_page_seconds_total', '페이지 실행 전체 소요 시간(초)', 'page', _page_totals, 1),
+        ('app_stage_calls_total', '단계 호출 수', 'stage', _stage_totals, 0),
+        ('app_stage_seconds_total', '단계 소요 시간(초)', 'stage', _stage_totals, 1),
+        ('app_stage_rows_total', '단계가 처리한 행 수', 'stage', _stage_totals, 2),
+        ('app_stage_bytes_total', '단계가 처리한 바이트 수', 'stage', _stage_totals, 3),
+        ('app_events_total', '캐시 적중/실패 등 이벤트 횟수', 'event', _event_totals, None),
+    ]
+    lines = []
+    with _totals_lock:
+        for name, help_text, label, source, pos in metrics:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key, value in sorted(source.items()):
+                value = value if pos is None else value[pos]
+                if label == 'page':
+                    labels = f'page="{_label(key)}"'
+                else:
+                    labels = f'page="{_label(key[0])}",{label}="{_label(key[1])}"'
+                lines.append(f'{name}{{{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path=None):
+    # node_exporter textfile collector가 반쯤 쓴 파일을 읽지 않도록 임시 파일로 쓴 뒤 교체
+    path = path or os.path.join(METRICS_DIR, 'app.prom')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # 여러 세션이 동시에 내보내도 임시 파일이 겹치지 않도록 고유한 이름 사용
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(prometheus_text())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from anomaly_engine import score_module, scores_path
+from data_store import CSV_DIR, STORE_DIR, append_new_rows, load_module, module_lock, read_window, store_end, store_path
+from rollup import build_rollups, update_rollups
+
+# 실시간 모드 화면 갱신 주기(초)와 표시 구간(시간)
+POLL_SECONDS = 60
+LIVE_WINDOW_HOURS = 48
+
+
+def poll_module(module_id, csv_dir=CSV_DIR, store_dir=STORE_DIR):
+    """
+    원본 CSV에 마지막 오프셋 이후 추가된 줄만 저장소에 붙이고, 롤업과 이상치 점수를 그 구간만 갱신
+    반환: 새 행 수 (원본이 추가가 아닌 방식으로 바뀌어 전체를 다시 만들었으면 None)
+    """
+    # 저장소 변환/추가와 같은 모듈별 잠금으로 롤업·점수 갱신까지 한 번에 직렬화
+    with module_lock(module_id, store_dir):
+        new_rows = append_new_rows(module_id, csv_dir, store_dir)
+        if new_rows is None:
+            build_rollups(module_id, store_dir)
+            score_module(module_id, refit=True, store_dir=store_dir)
+            return None
+        if len(new_rows):
+            update_rollups(module_id, new_rows=new_rows, store_dir=store_dir)
+            score_module(module_id, new_rows=new_rows, store_dir=store_dir)
+        return len(new_rows)
+
+
+def latest_window(module_id, columns=None, hours=LIVE_WINDOW_HOURS, store_dir=STORE_DIR):
+    """
+    저장소의 마지막 시각부터 hours 시간 전까지만 읽음 (이력 전체를 다시 읽지 않음)
+    """
+    end = store_end(store_path(module_id, store_dir))
+    start = None if end is None else end - pd.Timedelta(hours=hours)
+    return load_module(module_id, columns=columns, start=start, store_dir=store_dir)
+
+
+def latest_scores(module_id, hours=LIVE_WINDOW_HOURS, store_dir=STORE_DIR):
+    """
+    저장된 이상치 점수 중 최근 hours 시간만 읽음
+    """
+    end = store_end(store_path(module_id, store_dir))
+    start = None if end is None else end - pd.Timedelta(hours=hours)
+    return read_window(scores_path(module_id, store_dir), start=start, time_col='timestamp')
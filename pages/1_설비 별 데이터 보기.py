@@ -1,23 +1,50 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import plotly.graph_objects as go
-import os
 
-# 사용 가능한 모듈만 지정
-AVAILABLE_MODULES = [1, 2, 3, 4, 5, 11, 12, 13, 14, 15, 16, 17, 18]
-MODULES = [os.path.join('csv', f'resampled_module{i}.csv') for i in AVAILABLE_MODULES]
+from charts import COLUMN_GROUPS, group_figure
+from data_service import shared_cache
+from diagnostics import show_diagnostics, start_page, traced_fragment
+from data_store import AVAILABLE_MODULES
+from downsample import DEFAULT_POINTS
+from instrumentation import stage
+from live_tail import LIVE_WINDOW_HOURS, POLL_SECONDS, latest_window, poll_module
+from rollup import load_rollup, pick_level
+
+
+def load_data(module_number, start, end, columns):
+    # 공유 캐시에서 [start, end) 구간과 필요한 지표 컬럼만 복사 없이 잘라 옴
+    return shared_cache().window(module_number, columns, start, end)
 
 
 @st.cache_data
-def load_data(path):
-    encodings = ['utf-8', 'utf-8-sig', 'cp949', 'euc-kr']
-    for enc in encodings:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except UnicodeDecodeError:
-            continue
-    raise ValueError(f"CSV 파일 {path}을 열 수 없습니다.")
+def load_rollup_data(module_number, level, start, end, columns):
+    # 사전 집계된 롤업에서 지표별 min/max/mean 컬럼만 읽음
+    agg_columns = [f'{col}_{agg}' for col in columns for agg in ('min', 'max', 'mean')]
+    return load_rollup(module_number, level, columns=agg_columns, start=start, end=end)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+@traced_fragment("설비 별 데이터 보기 · 실시간")
+def live_view(module_number, selected_groups):
+    # 원본에 새로 추가된 행만 반영하고 최근 구간 차트만 주기적으로 다시 그림
+    new_count = poll_module(module_number)
+    columns = [col for group in selected_groups for col in COLUMN_GROUPS[group]]
+    recent = latest_window(module_number, columns=columns)
+    if recent.empty:
+        st.info("최근 수신 데이터가 없습니다.")
+        return
+
+    st.caption(f"최근 {LIVE_WINDOW_HOURS}시간 · 마지막 수신 {recent['localtime'].iloc[-1]:%Y-%m-%d %H:%M} · "
+               f"이번 갱신 신규 {new_count or 0}행")
+    for group_name in selected_groups:
+        fig = go.Figure()
+        for col_name in COLUMN_GROUPS[group_name]:
+            fig.add_trace(go.Scatter(x=recent['localtime'], y=recent[col_name], mode='lines', name=col_name))
+        fig.update_layout(title=f"{group_name} 실시간 추이", xaxis_title="시간", yaxis_title="값",
+                          height=300, margin=dict(t=40, b=40), legend_title_text='지표')
+        st.plotly_chart(fig, use_container_width=True)
 
 def main():
     st.title("설비 별 데이터 셋 분석기")
@@ -50,59 +77,67 @@ def main():
         max_allowed_date = datetime(2025, 4, 30)
         start_date = st.date_input("시작 날짜", min_value=min_allowed_date, max_value=max_allowed_date, value=min_allowed_date)
         end_date = st.date_input("종료 날짜", min_value=min_allowed_date, max_value=max_allowed_date, value=max_allowed_date)
+        selected_groups = st.multiselect("표시할 지표 그룹", list(COLUMN_GROUPS), default=list(COLUMN_GROUPS))
         analyze_button = st.button("분석하기")
+        live = st.toggle("🔴 실시간 모드", value=False)
 
-    if analyze_button:
-        DATA_PATH = os.path.join('csv', f'resampled_module{module_number}.csv')
-        # [os.path.join('csv', f'resampled_module{i}.csv') for i in AVAILABLE_MODULES]
-
-        df = load_data(DATA_PATH)
-
-        # 날짜 변환
-        df['localtime_dt'] = pd.to_datetime(df['localtime'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    if live:
+        st.subheader("🔴 실시간 모니터링")
+        live_view(module_number, selected_groups)
 
-        # 날짜 필터 설정 전 유효성 체크
-        if df['localtime_dt'].isna().all():
-            st.error("⚠️ 유효한 날짜 데이터가 없습니다. 'localtime' 컬럼을 확인해주세요.")
-            return
-
-        start_datetime = pd.to_datetime(start_date)
-        end_datetime = pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-
-        filtered_df = df[(df['localtime_dt'] >= start_datetime) & (df['localtime_dt'] <= end_datetime)]
+    if analyze_button:
+        st.session_state['analysis'] = (
+            module_number,
+            pd.to_datetime(start_date),
+            pd.to_datetime(end_date) + pd.Timedelta(days=1),
+            tuple(selected_groups),
+        )
+
+    # 확대 구간 슬라이더를 움직여도 분석 결과가 유지되도록 세션에 보관
+    if 'analysis' in st.session_state:
+        module_number, start_datetime, end_datetime, selected_groups = st.session_state['analysis']
+        columns = tuple(col for group in selected_groups for col in COLUMN_GROUPS[group])
 
         # 주요 지표 시각화
         st.subheader("📈 주요 지표 시각화 (시간별)")
 
-        column_groups = {
-            "Phase Voltages": ['voltageR', 'voltageS', 'voltageT'],
-            "Line Voltages": ['voltageRS', 'voltageST', 'voltageTR'],
-            "Currents": ['currentR', 'currentS', 'currentT'],
-            "Power Factors": ['powerFactorR', 'powerFactorS', 'powerFactorT'],
-            "Power Metrics": ['activePower', 'reactivePowerLagging']
-        }
+        # 확대 구간만 저장소에서 다시 읽어 세부 데이터를 표시
+        zoom_start, zoom_end = st.slider(
+            "🔍 확대 구간",
+            min_value=start_datetime.to_pydatetime(),
+            max_value=end_datetime.to_pydatetime(),
+            value=(start_datetime.to_pydatetime(), end_datetime.to_pydatetime()),
+            step=timedelta(hours=1),
+            format="YYYY-MM-DD HH:mm"
+        )
+        zoom_start, zoom_end = pd.Timestamp(zoom_start), pd.Timestamp(zoom_end)
+
+        # 차트를 채울 수 있는 가장 거친 롤업 단위를 선택 (짧은 구간은 원본 사용)
+        level = pick_level(zoom_start, zoom_end, DEFAULT_POINTS)
+        with stage('load_window' if level is None else f'load_rollup_{level}') as s:
+            if level is None:
+                filtered_df = load_data(module_number, zoom_start, zoom_end, columns)
+            else:
+                filtered_df = load_rollup_data(module_number, level, zoom_start, zoom_end, columns)
+            s.set(rows=len(filtered_df))
+
+        if filtered_df.empty:
+            st.error("⚠️ 선택한 기간에 유효한 날짜 데이터가 없습니다. 'localtime' 컬럼을 확인해주세요.")
+            return
+
+        if level is None:
+            st.caption(f"구간 내 {len(filtered_df):,}행 → 지표별 최대 {DEFAULT_POINTS:,}점으로 축약 (구간별 최솟값/최댓값 유지)")
+        else:
+            st.caption(f"집계 단위 {level}: 구간 내 {len(filtered_df):,}개 구간 (선: 평균, 띠: 최솟값~최댓값)")
 
-        for group_name, cols_in_group in column_groups.items():
+        for group_name in selected_groups:
             st.markdown(f"#### {group_name}")
-            fig = go.Figure()
-
-            for col_name in cols_in_group:
-                fig.add_trace(go.Scatter(
-                    x=filtered_df['localtime_dt'],
-                    y=pd.to_numeric(filtered_df[col_name], errors='coerce'),
-                    mode='lines',
-                    name=col_name
-                ))
-
-            fig.update_layout(
-                title=f"{group_name} 추이",
-                xaxis_title="시간",
-                yaxis_title="값",
-                height=400,
-                margin=dict(t=40, b=40),
-                legend_title_text='지표'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with stage('chart.render', rows=len(filtered_df)):
+                st.plotly_chart(group_figure(filtered_df, group_name, level), use_container_width=True)
 
 if __name__ == '__main__':
-    main()
+    trace = start_page("설비 별 데이터 보기")
+    try:
+        main()
+    finally:
+        show_diagnostics(trace)
@@ -1,188 +1,260 @@
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
-import zipfile
-import io
-from detect_module5_light import get_anomaly_df as get_df5
-from detect_module13_light import get_anomaly_df as get_df13
-from detect_module15_light import get_anomaly_df as get_df15
+import math
+from anomaly_engine import ANOMALY_THRESHOLD, get_anomaly_df
+from comparison import CANDIDATE_COLUMNS, compare_frames
+from data_service import shared_cache
+from data_store import AVAILABLE_MODULES
+from diagnostics import show_diagnostics, start_page, traced_fragment
+from downsample import downsample_series
+from features import DERIVED_COLUMNS
+from instrumentation import stage
+from live_tail import LIVE_WINDOW_HOURS, POLL_SECONDS, latest_scores, poll_module
+from threshold_index import build_index
+from upload_reader import read_upload
 
 st.set_page_config(page_title="운영 이상 감지 및 정제", layout="wide")
 st.title("운영 이상 감지 및 정제 대시보드")
 
-# 모듈 선택
-module = st.selectbox("모듈 선택", ["module5", "module13", "module15"])
-get_df = {"module5": get_df5, "module13": get_df13, "module15": get_df15}[module]
-df = get_df()
-
-# 타임 필터
-df = df.sort_values("timestamp")
-min_time = pd.to_datetime(df["timestamp"].min()).to_pydatetime()
-max_time = pd.to_datetime(df["timestamp"].max()).to_pydatetime()
-time_range = st.slider("⏱️ 시간 범위 선택", min_value=min_time, max_value=max_time,
-                       value=(min_time, max_time), format="YYYY-MM-DD HH:mm")
-df = df[(df["timestamp"] >= time_range[0]) & (df["timestamp"] <= time_range[1])]
-
-# 이상치 기준 설정
-threshold = st.slider("⚠️ 이상치 기준 에러값", min_value=0.0, max_value=2.0, value=1.0, step=0.1)
-df["is_anomaly"] = df["total_error"] > threshold
-
-# 이상치 수 요약
-anomaly_count = df["is_anomaly"].sum()
-st.markdown(f"### 🔍 이상치 감지 수: **:red[{anomaly_count}건]** / 총 {len(df)}건")
-
-# 시각화
-fig = go.Figure()
-
-# 정상 라인
-fig.add_trace(go.Scatter(
-    x=df["timestamp"],
-    y=df["total_error"],
-    mode="lines",
-    name="정상값",
-    line=dict(color="steelblue", width=2)
-))
-
-# 이상치 포인트
-fig.add_trace(go.Scatter(
-    x=df[df["is_anomaly"]]["timestamp"],
-    y=df[df["is_anomaly"]]["total_error"],
-    mode="markers",
-    name="이상치",
-    marker=dict(color="red", size=10, symbol="circle-open-dot"),
-))
-
-fig.update_layout(
-    title=f"{module.upper()} 전력 이상치 감지 결과",
-    xaxis_title="시간",
-    yaxis_title="오차 크기",
-    height=500,
-    font=dict(size=16),
-    legend=dict(font=dict(size=14))
-)
-
-st.plotly_chart(fig, use_container_width=True)
-
-st.markdown("## 🧹 정제된 결과 확인")
-
-# CSV 또는 ZIP 파일 업로드
-uploaded_file = st.file_uploader("📂 정제된 파일 업로드 (CSV 또는 ZIP)", type=["csv", "zip"])
-
-if uploaded_file is not None:
-    try:
-        df_cleaned = None
-        
-        # ZIP 파일 처리
-        if uploaded_file.name.endswith('.zip'):
-            with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
-                csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv')]
-                
-                if not csv_files:
-                    st.error("❌ ZIP 파일 내에 CSV 파일이 없습니다.")
+MAX_INTERVAL_SHAPES = 200
+STAT_LABELS = {
+    'column': '컬럼', 'nan_before': '정제 전 NaN', 'nan_after': '정제 후 NaN',
+    'rows_removed': '삭제된 행', 'rows_added': '추가된 행', 'values_imputed': '보간된 값',
+    'values_dropped': '제거된 값', 'values_modified': '수정된 값', 'max_deviation': '최대 편차',
+    'changed_rows': '변경된 행', 'intervals': '변경 구간 수',
+}
+
+
+@st.cache_data(ttl=600)
+def get_df(module_number):
+    # 저장된 점수를 읽고, 마지막 채점 이후 들어온 시간대만 추가 채점
+    return get_anomaly_df(module_number)
+
+
+def get_raw(module_number, start, end, columns):
+    # 정제본과 비교할 원본 모듈 데이터 [start, end) (공유 캐시의 뷰)
+    return shared_cache().window(module_number, columns, start, end)
+
+
+@st.cache_resource(max_entries=64)
+def get_index(module_number, start, end, n_scores):
+    # 모듈·구간별 정렬 색인은 세션 간에 공유 (n_scores: 점수가 추가되면 새로 만들기 위한 키)
+    # 이상치 시점의 파생 지표(저장 시점에 계산된 값)도 이때 한 번만 시각으로 찾아 둠
+    return build_index(get_df(module_number), start, end, shared_cache().get(module_number), DERIVED_COLUMNS)
+
+
+@st.fragment
+@traced_fragment("운영 이상 감지 및 정제 · 기준값")
+def threshold_view(module_number, index):
+    # 이상치 기준 설정
+    # total_error는 학습 구간 99% 분위수가 1.0이 되도록 정규화되어 있음
+    max_error = max(2.0, math.ceil(index.max_error))
+    threshold = st.slider("⚠️ 이상치 기준 에러값", min_value=0.0, max_value=float(max_error),
+                          value=ANOMALY_THRESHOLD, step=0.1, key="threshold")
+
+    # 이상치 수/목록/원인 지표는 정렬 색인에서 이진 탐색과 누적합으로 바로 구함
+    with stage('threshold.anomalies', rows=index.n):
+        anomalies = index.anomalies(threshold)
+    st.markdown(f"### 🔍 이상치 감지 수: **:red[{len(anomalies)}건]** / 총 {index.n}건")
+
+    # 시각화
+    fig = go.Figure()
+
+    # 정상 라인 (스파이크를 유지하며 차트 폭에 맞게 축약해 둔 값, 이상치 포인트는 전부 표시)
+    fig.add_trace(go.Scatter(
+        x=index.line_x,
+        y=index.line_y,
+        mode="lines",
+        name="정상값",
+        line=dict(color="steelblue", width=2)
+    ))
+
+    # 이상치 포인트
+    fig.add_trace(go.Scatter(
+        x=anomalies["timestamp"],
+        y=anomalies["total_error"],
+        mode="markers",
+        name="이상치",
+        marker=dict(color="red", size=10, symbol="circle-open-dot"),
+    ))
+
+    fig.update_layout(
+        title=f"MODULE{module_number} 전력 이상치 감지 결과",
+        xaxis_title="시간",
+        yaxis_title="오차 크기",
+        height=500,
+        font=dict(size=16),
+        legend=dict(font=dict(size=14))
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+    if len(anomalies):
+        breakdown = index.feature_breakdown(threshold)
+        st.caption("주요 원인 지표: " + ", ".join(f"{name} {count}건" for name, count in breakdown.items()))
+
+        # 이상치 시점의 파생 지표 (색인을 만들 때 찾아 둔 값)
+        with st.expander(f"📋 이상치 시점 파생 지표 ({len(anomalies)}건)"):
+            st.dataframe(anomalies, use_container_width=True, hide_index=True)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+@traced_fragment("운영 이상 감지 및 정제 · 실시간")
+def live_errors(module_number):
+    # 새로 추가된 시간대만 저장소/점수에 반영하고 이 차트만 주기적으로 다시 그림
+    new_count = poll_module(module_number)
+    if new_count != 0:
+        get_df.clear()
+    threshold = st.session_state.get("threshold", ANOMALY_THRESHOLD)
+    recent = latest_scores(module_number)
+    if recent.empty:
+        st.info("최근 수신 데이터가 없습니다.")
+        return
+
+    is_anomaly = recent["total_error"] > threshold
+    st.caption(f"최근 {LIVE_WINDOW_HOURS}시간 · 마지막 수신 {recent['timestamp'].iloc[-1]:%Y-%m-%d %H:%M} · "
+               f"이번 갱신 신규 {new_count or 0}행 · 이상치 {is_anomaly.sum()}건")
+    live_fig = go.Figure()
+    live_fig.add_trace(go.Scatter(x=recent["timestamp"], y=recent["total_error"], mode="lines",
+                                  name="오차", line=dict(color="steelblue", width=2)))
+    live_fig.add_trace(go.Scatter(x=recent.loc[is_anomaly, "timestamp"], y=recent.loc[is_anomaly, "total_error"],
+                                  mode="markers", name="이상치", marker=dict(color="red", size=10, symbol="circle-open-dot")))
+    live_fig.add_hline(y=threshold, line_dash="dot", line_color="red")
+    live_fig.update_layout(title="실시간 이상치 감지", xaxis_title="시간", yaxis_title="오차 크기", height=350)
+    st.plotly_chart(live_fig, use_container_width=True)
+
+
+trace = start_page("운영 이상 감지 및 정제")
+try:
+    # 모듈 선택
+    module_number = st.selectbox("모듈 선택", AVAILABLE_MODULES, format_func=lambda m: f"module{m}")
+    with stage('load_scores') as s:
+        df = get_df(module_number)
+        s.set(rows=len(df))
+
+    # 타임 필터
+    min_time = pd.to_datetime(df["timestamp"].min()).to_pydatetime()
+    max_time = pd.to_datetime(df["timestamp"].max()).to_pydatetime()
+    time_range = st.slider("⏱️ 시간 범위 선택", min_value=min_time, max_value=max_time,
+                           value=(min_time, max_time), format="YYYY-MM-DD HH:mm")
+
+    # 기준값 슬라이더는 fragment 안에 있으므로 움직여도 이 차트 영역만 다시 그림
+    with stage('threshold_index'):
+        index = get_index(module_number, time_range[0], time_range[1], len(df))
+    with stage('threshold_view', rows=index.n):
+        threshold_view(module_number, index)
+
+    # 실시간 모드: 원본에 추가되는 행을 주기적으로 반영 (전체 페이지는 다시 실행하지 않음)
+    if st.toggle("🔴 실시간 모드", value=False):
+        live_errors(module_number)
+
+    st.markdown("## 🧹 정제된 결과 확인")
+
+    # CSV 또는 ZIP 파일 업로드
+    uploaded_file = st.file_uploader("📂 정제된 파일 업로드 (CSV 또는 ZIP)", type=["csv", "zip"])
+
+    if uploaded_file is not None:
+        try:
+            df_cleaned = None
+
+            # 한 번의 스트리밍 패스로 파싱 (ZIP이면 모든 CSV를 동시에). 선택만 바뀌는 재실행에서는 다시 읽지 않음
+            upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+            if st.session_state.get('upload_key') != upload_key:
+                with st.spinner("파일을 읽는 중..."):
+                    st.session_state['upload_parsed'] = read_upload(uploaded_file)
+                st.session_state['upload_key'] = upload_key
+            parsed = st.session_state['upload_parsed']
+
+            if not parsed:
+                st.error("❌ ZIP 파일 내에 CSV 파일이 없습니다.")
+            else:
+                csv_files = list(parsed)
+                # CSV 파일이 여러 개인 경우 선택하게 함
+                if len(csv_files) > 1:
+                    selected_csv = st.selectbox("📋 처리할 CSV 파일 선택", csv_files)
                 else:
-                    # CSV 파일이 여러 개인 경우 선택하게 함
-                    if len(csv_files) > 1:
-                        selected_csv = st.selectbox("📋 처리할 CSV 파일 선택", csv_files)
-                    else:
-                        selected_csv = csv_files[0]
-                    
+                    selected_csv = csv_files[0]
+
+                if uploaded_file.name.endswith('.zip'):
                     st.info(f"📄 선택된 파일: {selected_csv}")
-                    
-                    # ZIP 내부 CSV 파일 읽기
-                    with zip_ref.open(selected_csv) as csv_file:
-                        # CSV 내용을 메모리로 읽어오기
-                        csv_content = csv_file.read()
-                        csv_io = io.StringIO(csv_content.decode('utf-8'))
-                        
-                        # 먼저 컬럼명 확인
-                        temp_df = pd.read_csv(csv_io, nrows=0)
-                        csv_io.seek(0)  # StringIO는 seek가 가능
-                        
-                        # timestamp 관련 컬럼 찾기 (localtime 포함)
-                        timestamp_cols = [col for col in temp_df.columns if 'time' in col.lower() or 'date' in col.lower()]
-                        
-                        if timestamp_cols:
-                            df_cleaned = pd.read_csv(csv_io, parse_dates=timestamp_cols)
-                            # timestamp 컬럼이 없으면 첫 번째 시간 관련 컬럼을 timestamp로 rename
-                            if 'timestamp' not in df_cleaned.columns and timestamp_cols:
-                                df_cleaned = df_cleaned.rename(columns={timestamp_cols[0]: 'timestamp'})
-                                st.info(f"✅ '{timestamp_cols[0]}' 컬럼을 'timestamp'로 변경했습니다.")
-                        else:
-                            df_cleaned = pd.read_csv(csv_io)
-                            st.warning("⚠️ 시간 관련 컬럼을 찾을 수 없습니다. 시간 기반 분석이 제한될 수 있습니다.")
-        
-        # 일반 CSV 파일 처리
-        else:
-            # 먼저 컬럼명 확인
-            temp_df = pd.read_csv(uploaded_file, nrows=0)
-            uploaded_file.seek(0)  # 파일 포인터 되돌리기
-            
-            timestamp_cols = [col for col in temp_df.columns if 'time' in col.lower() or 'date' in col.lower()]
-            
-            if timestamp_cols:
-                df_cleaned = pd.read_csv(uploaded_file, parse_dates=timestamp_cols) 
-                if 'timestamp' not in df_cleaned.columns and timestamp_cols:
-                    df_cleaned = df_cleaned.rename(columns={timestamp_cols[0]: 'timestamp'})
-            else:
-                df_cleaned = pd.read_csv(uploaded_file)
-                st.warning("⚠️ 시간 관련 컬럼을 찾을 수 없습니다.")
-        
-        # 데이터가 성공적으로 로드된 경우
-        if df_cleaned is not None:
-            # timestamp 컬럼이 있는 경우에만 정렬
-            if 'timestamp' in df_cleaned.columns:
-                df_cleaned = df_cleaned.sort_values("timestamp")
-            else:
-                st.info("📋 업로드된 파일의 컬럼 목록: " + ", ".join(df_cleaned.columns.tolist()))
 
-            MAX_ROWS = 5000
-            df_small = df.copy()
-            df_cleaned_small = df_cleaned.copy()
+                df_cleaned, timestamp_cols = parsed[selected_csv]
+                if timestamp_cols:
+                    # timestamp 컬럼이 없으면 첫 번째 시간 관련 컬럼을 timestamp로 rename
+                    if 'timestamp' not in df_cleaned.columns:
+                        df_cleaned = df_cleaned.rename(columns={timestamp_cols[0]: 'timestamp'})
+                        st.info(f"✅ '{timestamp_cols[0]}' 컬럼을 'timestamp'로 변경했습니다.")
+                else:
+                    st.warning("⚠️ 시간 관련 컬럼을 찾을 수 없습니다. 시간 기반 분석이 제한될 수 있습니다.")
 
-            if len(df_small) > MAX_ROWS:
-                df_small = df_small.iloc[:MAX_ROWS]
-            if len(df_cleaned_small) > MAX_ROWS:
-                df_cleaned_small = df_cleaned_small.iloc[:MAX_ROWS]
+            # 데이터가 성공적으로 로드된 경우
+            if df_cleaned is not None:
+                # timestamp 컬럼이 있는 경우에만 정렬
+                if 'timestamp' in df_cleaned.columns:
+                    df_cleaned = df_cleaned.sort_values("timestamp")
+                else:
+                    st.info("📋 업로드된 파일의 컬럼 목록: " + ", ".join(df_cleaned.columns.tolist()))
 
-            # 시각화할 컬럼 선택
-            candidate_cols = ['activePower', 'currentR', 'currentS', 'currentT', 'powerFactorR', 'powerFactorS', 'powerFactorT']
-            available_cols = [col for col in candidate_cols if col in df_cleaned.columns]
+                # 시각화할 컬럼 선택
+                available_cols = [col for col in CANDIDATE_COLUMNS if col in df_cleaned.columns]
 
-            if not available_cols:
-                st.warning("⚠️ 정제된 데이터에 시각화 가능한 수치형 컬럼이 없습니다.")
-            else:
-                selected_col = st.selectbox("📊 정제 후 시각화할 컬럼 선택", available_cols)
+                if not available_cols:
+                    st.warning("⚠️ 정제된 데이터에 시각화 가능한 수치형 컬럼이 없습니다.")
+                elif 'timestamp' not in df_cleaned.columns:
+                    # 시간 컬럼이 없으면 원본과 맞출 수 없으므로 정제본만 표시
+                    selected_col = st.selectbox("📊 정제 후 시각화할 컬럼 선택", available_cols)
+                    x_axis, y2 = downsample_series(df_cleaned.index, pd.to_numeric(df_cleaned[selected_col], errors='coerce'))
+                    fig2 = go.Figure(go.Scatter(x=x_axis, y=y2, mode="lines", name="정제 후", line=dict(color="green", width=2)))
+                    fig2.update_layout(title=f"정제 후 `{selected_col}`", xaxis_title="인덱스", yaxis_title=selected_col, height=500)
+                    st.plotly_chart(fig2, use_container_width=True)
+                else:
+                    # 정제본이 다루는 기간의 원본 모듈 데이터와 시간 기준으로 맞춰 한 번에 비교
+                    start = df_cleaned["timestamp"].min()
+                    end = df_cleaned["timestamp"].max() + pd.Timedelta(microseconds=1)
+                    with stage('load_window') as s:
+                        raw = get_raw(module_number, start, end, tuple(available_cols))
+                        s.set(rows=len(raw))
+                    with stage('compare', rows=len(raw) + len(df_cleaned)):
+                        aligned, stats, intervals = compare_frames(raw, df_cleaned, available_cols)
+
+                    st.markdown("#### 📋 컬럼별 정제 통계")
+                    st.dataframe(stats.rename(columns=STAT_LABELS), use_container_width=True, hide_index=True)
 
-                fig2 = go.Figure()
+                    selected_col = st.selectbox("📊 정제 후 시각화할 컬럼 선택", available_cols)
+                    col_stats = stats.set_index('column').loc[selected_col]
+                    st.write(f"정제 전 NaN 수: {col_stats['nan_before']} / 정제 후 NaN 수: {col_stats['nan_after']}")
 
-                if selected_col in df_small.columns:
-                    y1 = pd.to_numeric(df_small[selected_col], errors='coerce')
-                    st.write(f"정제 전 NaN 수: {y1.isna().sum()}")
-                    
-                    # timestamp가 있는 경우 시간축 사용, 없으면 인덱스 사용
-                    x_axis = df_small["timestamp"] if "timestamp" in df_small.columns else df_small.index
+                    fig2 = go.Figure()
+                    x_axis, y1 = downsample_series(aligned["timestamp"], aligned[f"{selected_col}_before"])
                     fig2.add_trace(go.Scatter(
                         x=x_axis, y=y1,
                         mode="lines", name="정제 전", line=dict(color="lightgray")
                     ))
+                    x_axis_cleaned, y2 = downsample_series(aligned["timestamp"], aligned[f"{selected_col}_after"])
+                    fig2.add_trace(go.Scatter(
+                        x=x_axis_cleaned, y=y2,
+                        mode="lines", name="정제 후", line=dict(color="green", width=2)
+                    ))
 
-                y2 = pd.to_numeric(df_cleaned_small[selected_col], errors='coerce')
-                st.write(f"정제 후 NaN 수: {y2.isna().sum()}")
-
-                x_axis_cleaned = df_cleaned_small["timestamp"] if "timestamp" in df_cleaned_small.columns else df_cleaned_small.index
-                fig2.add_trace(go.Scatter(
-                    x=x_axis_cleaned, y=y2,
-                    mode="lines+markers", name="정제 후", line=dict(color="green", width=2)
-                ))
+                    # 변경 구간은 긴 것부터 최대 MAX_INTERVAL_SHAPES개만 음영으로 표시
+                    col_intervals = intervals[intervals["column"] == selected_col]
+                    shown = col_intervals.nlargest(MAX_INTERVAL_SHAPES, "rows")
+                    for row in shown.itertuples():
+                        fig2.add_vrect(x0=row.start, x1=row.end + pd.Timedelta(hours=1),
+                                       fillcolor="orange", opacity=0.2, line_width=0)
 
-                fig2.update_layout(
-                    title=f"정제 전후 `{selected_col}` 비교",
-                    xaxis_title="시간" if "timestamp" in df_cleaned_small.columns else "인덱스", 
-                    yaxis_title=selected_col,
-                    height=500
-                )
+                    fig2.update_layout(
+                        title=f"정제 전후 `{selected_col}` 비교",
+                        xaxis_title="시간",
+                        yaxis_title=selected_col,
+                        height=500
+                    )
 
-                st.plotly_chart(fig2, use_container_width=True)
+                    st.plotly_chart(fig2, use_container_width=True)
+                    st.caption(f"변경 구간 {len(col_intervals)}개 중 {len(shown)}개 표시")
 
-    except Exception as e:
-        st.error(f"❌ 파일 처리 중 오류 발생: {e}")
+        except Exception as e:
+            st.error(f"❌ 파일 처리 중 오류 발생: {e}")
+finally:
+    show_diagnostics(trace)
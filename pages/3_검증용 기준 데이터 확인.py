@@ -4,6 +4,66 @@ import os
 from datetime import datetime
 import plotly.graph_objects as go
 
+from diagnostics import show_diagnostics, start_page
+from forecast_eval import TARGETS, list_runs, load_ground_truth, load_run, save_run, to_prediction_frame
+
+METRIC_LABELS = {'run_id': '실행', 'horizon': '예측 구간', 'n': '시간 수', 'mae': 'MAE', 'rmse': 'RMSE',
+                 'mape': 'MAPE(%)', 'bias': '편향', 'model_version': '모델 버전'}
+
+
+@st.cache_data
+def get_run(run_id):
+    # 저장된 실행 결과는 바뀌지 않으므로 한 번만 읽음
+    return load_run(run_id)
+
+
+def show_evaluation(file_path):
+    st.subheader("🎯 예측 실행 평가")
+
+    uploaded = st.file_uploader("📂 예측 결과 CSV 업로드 (id + 지표 컬럼)", type="csv")
+    if uploaded is not None:
+        pred = to_prediction_frame(pd.read_csv(uploaded))
+        if pred is None:
+            st.warning("⚠️ 'id'와 평가할 지표 컬럼(" + ", ".join(TARGETS) + ")이 필요합니다.")
+        elif st.button("📏 평가 후 저장"):
+            run_id, _, _ = save_run(pred, load_ground_truth(file_path), model_version=f"upload:{uploaded.name}")
+            st.success(f"✅ 실행 {run_id} 저장 완료")
+
+    runs = list_runs()
+    if runs.empty:
+        st.info("저장된 예측 실행이 없습니다. '에너지 예측 결과 보기'에서 예측을 요청하거나 예측 CSV를 업로드하세요.")
+        return
+
+    run_ids = runs['run_id'].unique().tolist()
+    selected_runs = st.multiselect("📌 비교할 실행 선택", run_ids, default=run_ids[:2])
+    target = st.selectbox("📌 평가 지표 선택", TARGETS)
+    if not selected_runs:
+        return
+
+    # 지표는 저장 시점에 계산해 두었으므로 다시 계산하지 않음
+    table = runs[runs['run_id'].isin(selected_runs) & (runs['target'] == target)]
+    st.dataframe(table[list(METRIC_LABELS)].rename(columns=METRIC_LABELS), use_container_width=True, hide_index=True)
+
+    fig = go.Figure()
+    fig_cum = go.Figure()
+    for i, run_id in enumerate(selected_runs):
+        aligned = get_run(run_id)
+        if f'{target}_pred' not in aligned.columns:
+            continue
+        if i == 0:
+            fig.add_trace(go.Scatter(x=aligned['id'], y=aligned[f'{target}_true'], mode='lines',
+                                     name='정답', line=dict(color='black')))
+        fig.add_trace(go.Scatter(x=aligned['id'], y=aligned[f'{target}_pred'], mode='lines', name=run_id))
+        fig_cum.add_trace(go.Scatter(x=aligned['id'], y=aligned[f'{target}_cum_error'], mode='lines', name=run_id))
+
+    fig.update_layout(title=f"{target} 예측 vs 정답", xaxis_title="id", yaxis_title=target,
+                      height=300, margin=dict(t=40, b=40))
+    fig_cum.update_layout(title=f"{target} 누적 오차 (예측 - 정답)", xaxis_title="id", yaxis_title="누적 오차",
+                          height=300, margin=dict(t=40, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig_cum, use_container_width=True)
+
+
 def main():
     st.title("검증용 데이터 셋 정보 요약")
 
@@ -77,5 +137,11 @@ def main():
     else:
         st.warning("⚠️ 'id' 또는 시각화 가능한 지표 컬럼이 누락되었습니다.")
 
+    show_evaluation(file_path)
+
 if __name__ == '__main__':
-    main()
+    trace = start_page("검증용 기준 데이터 확인")
+    try:
+        main()
+    finally:
+        show_diagnostics(trace)
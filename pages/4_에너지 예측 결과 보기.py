@@ -1,40 +1,105 @@
 import streamlit as st
 import pandas as pd
-import requests
-import json
-
-# 업로드
-uploaded_files = st.file_uploader("모듈별 테스트 파일 업로드 (module (1) ~ module (5), module (11) ~ module (18))", type="csv", accept_multiple_files=True)
-
-if uploaded_files:
-    # 파일 이름 필터링 및 정렬 (module (1), module (2), ..., module (18))
-    filtered_files = [f for f in uploaded_files if any(f.name == f"module ({i}).csv" for i in list(range(1, 6)) + list(range(11, 19)))]
-    sorted_files = sorted(filtered_files, key=lambda x: int(x.name.split("(")[1].split(")")[0]))
-
-    df_list = []
-    for file in sorted_files:
-        try:
-            df = pd.read_csv(file)
-            df_list.append(df)
-        except Exception as e:
-            st.error(f"❌ {file.name} 읽기 실패: {e}")
-
-    if df_list:
-        df_combined = pd.concat(df_list, ignore_index=True)
-        st.write("✅ 통합된 DataFrame:", df_combined.head())
-
-        # 엔드포인트 전송
-        if st.button("📡 SageMaker 예측 요청"):
-            endpoint_url = "https://runtime.sagemaker.ap-northeast-2.amazonaws.com/endpoints/tft-endpoint/invocations"
-            headers = {
-                "Content-Type": "application/json",
-                "X-Amz-Target": "SageMaker.InvokeEndpoint"
-            }
 
+from baseline_forecast import LocalForecaster
+from data_store import AVAILABLE_MODULES
+from diagnostics import show_diagnostics, start_page
+from forecast_eval import load_ground_truth, save_run, to_prediction_frame
+from instrumentation import stage
+from payload_codec import CODECS
+from prediction_cache import PredictionCache
+from sagemaker_client import Boto3Transport, HttpTransport, InferenceClient
+
+
+@st.cache_resource
+def get_cache():
+    # 디스크 예측 캐시는 프로세스당 하나만 열어 공유
+    return PredictionCache()
+
+
+@st.cache_resource
+def get_client(stub_url, codec, compress, use_cache):
+    # 재실행/세션 간에 같은 커넥션 풀을 재사용
+    transport = HttpTransport(stub_url) if stub_url else Boto3Transport()
+    cache = get_cache() if use_cache else None
+    return InferenceClient(transport, codec=codec, compress=compress, cache=cache)
+
+
+@st.cache_data
+def ground_truth_range():
+    # 로컬 예측 기본 구간은 검증용 정답과 같은 시간대
+    ids = load_ground_truth()['id']
+    return ids.min().to_pydatetime(), len(ids)
+
+trace = start_page("에너지 예측 결과 보기")
+try:
+    # 업로드
+    uploaded_files = st.file_uploader("모듈별 테스트 파일 업로드 (module (1) ~ module (5), module (11) ~ module (18))", type="csv", accept_multiple_files=True)
+
+    if uploaded_files:
+        # 파일 이름 필터링 및 정렬 (module (1), module (2), ..., module (18))
+        filtered_files = [f for f in uploaded_files if any(f.name == f"module ({i}).csv" for i in AVAILABLE_MODULES)]
+        sorted_files = sorted(filtered_files, key=lambda x: int(x.name.split("(")[1].split(")")[0]))
+
+        frames = {}
+        for file in sorted_files:
             try:
-                json_payload = json.dumps(df_combined.to_dict(orient="records"))
-                response = requests.post(endpoint_url, data=json_payload, headers=headers)
-                st.success("🎉 예측 완료!")
-                st.json(response.json())
+                module_id = int(file.name.split("(")[1].split(")")[0])
+                with stage('upload.parse', nbytes=file.size) as s:
+                    frames[module_id] = pd.read_csv(file)
+                    s.set(rows=len(frames[module_id]))
             except Exception as e:
-                st.error(f"🚨 예측 요청 실패: {e}")
+                st.error(f"❌ {file.name} 읽기 실패: {e}")
+        df_list = list(frames.values())
+
+        if df_list:
+            df_combined = pd.concat(df_list, ignore_index=True)
+            st.write("✅ 통합된 DataFrame:", df_combined.head())
+
+            with st.sidebar:
+                backend = st.radio("예측 백엔드", ["SageMaker 엔드포인트", "로컬 기준 모델 (계절 naive + ridge)"])
+                local = backend.startswith("로컬")
+                if local:
+                    # 업로드한 모듈 이력으로 전 모듈을 한 번에 학습/예측 (네트워크 불필요)
+                    default_start, default_hours = ground_truth_range()
+                    forecast_start = st.date_input("예측 시작 날짜", value=default_start)
+                    forecast_hours = st.number_input("예측 시간 수", min_value=1, value=default_hours, step=24)
+                else:
+                    stub_url = st.text_input("로컬 스텁 엔드포인트 URL (비우면 SageMaker 호출)", "")
+                    # 엔드포인트가 지원하는 형식을 선택 (json-records는 기존 형식)
+                    codec = st.selectbox("요청 페이로드 형식", list(CODECS))
+                    compress = st.checkbox("gzip 압축", value=False)
+                    use_cache = st.checkbox("예측 캐시 사용 (같은 데이터는 엔드포인트 재호출 안 함)", value=True)
+
+            # 예측 요청 (엔드포인트는 모듈/시간 구간별 청크를 동시에 요청한 뒤 순서대로 병합)
+            if st.button("📈 로컬 예측 실행" if local else "📡 SageMaker 예측 요청"):
+                try:
+                    if local:
+                        client = LocalForecaster(pd.Timestamp(forecast_start), int(forecast_hours))
+                    else:
+                        client = get_client(stub_url, codec, compress, use_cache)
+                    progress = st.progress(0.0, text="📡 예측 요청 중...")
+
+                    def on_progress(done, total):
+                        progress.progress(done / total, text=f"📡 {done}/{total} 청크 완료")
+
+                    result = client.predict(frames, on_progress=on_progress)
+                    st.success("🎉 예측 완료!")
+                    stats = client.last_stats
+                    if not local:
+                        st.caption(f"💾 캐시 적중 {stats['cache_hits']}/{stats['chunks']} 청크 (엔드포인트 호출 {stats['chunks'] - stats['cache_hits']}건)")
+                    if isinstance(result, pd.DataFrame):
+                        st.dataframe(result)
+                    else:
+                        st.json(result)
+
+                    # 정답 데이터와 비교할 수 있도록 실행별로 평가 결과 저장 ('검증용 기준 데이터 확인'에서 비교)
+                    pred = to_prediction_frame(result)
+                    if pred is not None:
+                        with stage('evaluate'):
+                            run_id, _, _ = save_run(pred, model_version=stats.get('version') or client.version())
+                        st.info(f"📏 예측 실행 {run_id} 평가 결과를 저장했습니다.")
+                except Exception as e:
+                    st.error(f"🚨 예측 요청 실패: {e}")
+finally:
+    show_diagnostics(trace)
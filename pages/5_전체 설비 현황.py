@@ -0,0 +1,109 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import plotly.graph_objects as go
+
+from anomaly_engine import ANOMALY_THRESHOLD
+from diagnostics import show_diagnostics, start_page
+from fleet import fleet_summary, hourly_heatmap, load_fleet, load_fleet_scores
+from instrumentation import stage
+from tariff import BILL_RATE, TARIFFS, bill_series, fleet_energy, flat_tariff, what_if
+
+
+@st.cache_data
+def load_overview(start, end, by_hour_of_day):
+    # 전체 모듈을 한 번에 읽어 하나의 groupby/pivot으로 집계
+    df = load_fleet(start, end)
+    scores = load_fleet_scores(start, end)
+    return fleet_summary(df, scores), hourly_heatmap(df, by_hour_of_day=by_hour_of_day)
+
+
+@st.cache_data
+def load_energy(start, end):
+    # 전 모듈 시간당 전력을 (시간 × 모듈) 행렬로 한 번만 읽음
+    return fleet_energy(start, end)
+
+def main():
+    st.set_page_config(page_title="전체 설비 현황", layout="wide")
+    st.title("전체 설비 현황")
+
+    with st.sidebar:
+        min_allowed_date = datetime(2024, 12, 1)
+        max_allowed_date = datetime(2025, 4, 30)
+        start_date = st.date_input("시작 날짜", min_value=min_allowed_date, max_value=max_allowed_date, value=min_allowed_date)
+        end_date = st.date_input("종료 날짜", min_value=min_allowed_date, max_value=max_allowed_date, value=max_allowed_date)
+        heatmap_mode = st.radio("히트맵 시간축", ["시간대별 (0~23시)", "시간순"])
+
+    start_datetime = pd.to_datetime(start_date)
+    end_datetime = pd.to_datetime(end_date) + pd.Timedelta(days=1)
+    with stage('load_overview'):
+        summary, heatmap = load_overview(start_datetime, end_datetime, heatmap_mode.startswith("시간대별"))
+
+    if summary.empty:
+        st.warning("⚠️ 선택한 기간에 데이터가 없습니다.")
+        return
+
+    # 모듈별 요약 표
+    st.subheader("📋 모듈별 요약")
+    st.dataframe(
+        summary.rename(columns={
+            'module': '모듈',
+            'equipment': '설비',
+            'activePower_mean': '평균 유효전력',
+            'activePower_max': '최대 유효전력',
+            'powerFactor_mean': '평균 역률',
+            'currentImbalance_mean': '평균 전류 불평형률(%)',
+            'voltageImbalance_mean': '평균 전압 불평형률(%)',
+            'rows': '행 수',
+            'anomalies': f'이상치 수 (> {ANOMALY_THRESHOLD})',
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    labels = [f"{m} ({e})" for m, e in zip(summary['module'], summary['equipment'])]
+    col1, col2 = st.columns(2)
+
+    fig_power = go.Figure(go.Bar(x=labels, y=summary['activePower_mean'], name='평균 유효전력'))
+    fig_power.update_layout(title="모듈별 평균 유효전력", xaxis_title="모듈", yaxis_title="W", height=400, margin=dict(t=40, b=40))
+    col1.plotly_chart(fig_power, use_container_width=True)
+
+    fig_anomaly = go.Figure(go.Bar(x=labels, y=summary['anomalies'], marker_color='crimson', name='이상치 수'))
+    fig_anomaly.update_layout(title="모듈별 이상치 수", xaxis_title="모듈", yaxis_title="건", height=400, margin=dict(t=40, b=40))
+    col2.plotly_chart(fig_anomaly, use_container_width=True)
+
+    # 모듈 × 시간 히트맵
+    st.subheader("🌡️ 모듈 × 시간 평균 유효전력")
+    fig_heat = go.Figure(go.Heatmap(
+        z=heatmap.to_numpy(),
+        x=heatmap.columns,
+        y=[f"module{m}" for m in heatmap.index],
+        colorscale='Viridis',
+        colorbar=dict(title='W')
+    ))
+    fig_heat.update_layout(xaxis_title="시간", yaxis_title="모듈", height=500, margin=dict(t=40, b=40))
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+    # 요금·탄소: 단가표별 총액을 한 번의 행렬 곱으로 비교
+    st.subheader("💰 요금·탄소 배출 (단가표 비교)")
+    custom_rate = st.number_input("사용자 지정 단일 단가", min_value=0.0, value=BILL_RATE, step=10.0)
+    tariffs = {**TARIFFS, f'flat {custom_rate:g}': flat_tariff(custom_rate)}
+    with stage('load_energy'):
+        index, modules, energy = load_energy(start_datetime, end_datetime)
+    comparison = what_if(energy, index, [f"module{m}" for m in modules], tariffs)
+    st.dataframe(comparison[['total', 'carbon']].rename(columns={'total': '총 요금', 'carbon': '총 탄소 배출'}),
+                 use_container_width=True)
+
+    fig_bill = go.Figure()
+    for name, table in tariffs.items():
+        series = bill_series(energy, index, table)
+        fig_bill.add_trace(go.Scatter(x=series['id'], y=series['cum_bill'], mode='lines', name=name))
+    fig_bill.update_layout(title="단가표별 누적 요금", xaxis_title="시간", yaxis_title="요금", height=400, margin=dict(t=40, b=40))
+    st.plotly_chart(fig_bill, use_container_width=True)
+
+if __name__ == '__main__':
+    trace = start_page("전체 설비 현황")
+    try:
+        main()
+    finally:
+        show_diagnostics(trace)
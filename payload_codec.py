@@ -0,0 +1,145 @@
+import argparse
+import gzip
+import io
+import json
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from data_store import AVAILABLE_MODULES, csv_path
+
+GZIP_MAGIC = b'\x1f\x8b'
+GZIP_PARAM = 'content-encoding=gzip'
+
+
+def _encode_json_records(df):
+    # 기존 형식: 행마다 컬럼명이 반복되는 JSON 배열
+    return json.dumps(df.to_dict(orient="records")).encode('utf-8')
+
+
+def _encode_json_split(df):
+    # 컬럼명은 한 번만, 값은 행 배열로
+    return json.dumps({'columns': list(df.columns), 'data': df.to_numpy().tolist()}).encode('utf-8')
+
+
+def _encode_csv(df):
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def _encode_arrow(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _decode_json(body):
+    data = json.loads(body)
+    if isinstance(data, dict) and set(data) == {'columns', 'data'}:
+        return pd.DataFrame(data['data'], columns=data['columns'])
+    return data
+
+
+def _decode_csv(body):
+    return pd.read_csv(io.BytesIO(body), float_precision='round_trip')
+
+
+def _decode_arrow(body):
+    return pa.ipc.open_stream(body).read_all().to_pandas()
+
+
+# 형식 이름: (Content-Type, 인코더)
+CODECS = {
+    'json-records': ('application/json', _encode_json_records),
+    'json-split': ('application/json; format=split', _encode_json_split),
+    'csv': ('text/csv', _encode_csv),
+    'arrow': ('application/vnd.apache.arrow.stream', _encode_arrow),
+}
+DECODERS = {
+    'application/json': _decode_json,
+    'text/csv': _decode_csv,
+    'application/vnd.apache.arrow.stream': _decode_arrow,
+}
+
+
+def content_type_for(fmt, compress=False):
+    """
+    형식과 압축 여부로 Content-Type/Accept 값을 만듦 (예: 'text/csv; content-encoding=gzip')
+    """
+    if fmt not in CODECS:
+        raise ValueError(f"지원하지 않는 페이로드 형식입니다: {fmt}")
+    content_type = CODECS[fmt][0]
+    return f"{content_type}; {GZIP_PARAM}" if compress else content_type
+
+
+def encode_frame(df, fmt='json-records', compress=False):
+    """
+    DataFrame을 요청 본문으로 인코딩해 (bytes, Content-Type) 반환
+    """
+    content_type = content_type_for(fmt, compress)
+    body = CODECS[fmt][1](df)
+    if compress:
+        # 전송량보다 직렬화 CPU를 줄이는 쪽으로 가장 빠른 압축 단계 사용
+        # mtime=0: 헤더에 현재 시각이 들어가면 같은 청크도 매번 본문이 달라져 예측 캐시가 적중하지 않음
+        body = gzip.compress(body, compresslevel=1, mtime=0)
+    return body, content_type
+
+
+def decode_body(body, content_type=None):
+    """
+    응답 본문을 Content-Type에 맞게 디코딩. gzip은 헤더 파라미터나 매직 바이트로 판별
+    JSON은 파이썬 객체(split 형식이면 DataFrame), CSV/Arrow는 DataFrame으로 반환
+    """
+    content_type = content_type or 'application/json'
+    if GZIP_PARAM in content_type or body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+    mime = content_type.split(';')[0].strip().lower()
+    decoder = DECODERS.get(mime)
+    if decoder is None:
+        raise ValueError(f"지원하지 않는 응답 형식입니다: {content_type}")
+    return decoder(body)
+
+
+def benchmark(df, repeat=3):
+    """
+    형식 × 압축 조합별 본문 크기와 인코딩/디코딩 시간(ms) 비교
+    """
+    rows = []
+    for fmt in CODECS:
+        for compress in (False, True):
+            encode_ms, decode_ms = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                body, content_type = encode_frame(df, fmt, compress)
+                t1 = time.perf_counter()
+                decode_body(body, content_type)
+                t2 = time.perf_counter()
+                encode_ms.append((t1 - t0) * 1000)
+                decode_ms.append((t2 - t1) * 1000)
+            rows.append({
+                'format': fmt,
+                'gzip': compress,
+                'bytes': len(body),
+                'encode_ms': round(min(encode_ms), 2),
+                'decode_ms': round(min(decode_ms), 2),
+            })
+    out = pd.DataFrame(rows)
+    out['ratio'] = (out['bytes'] / out['bytes'].iloc[0]).round(3)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예측 요청 페이로드 인코딩 비교 (번들 모듈 CSV 기준)")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.concat([pd.read_csv(csv_path(m)) for m in args.modules], ignore_index=True)
+    print(f"{len(args.modules)}개 모듈, {len(df):,}행 × {len(df.columns)}열")
+    print(benchmark(df, args.repeat).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from data_store import STORE_DIR
+
+CACHE_PATH = os.path.join(STORE_DIR, 'prediction_cache.sqlite')
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    content_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_accessed ON predictions (accessed_at);
+"""
+
+
+def cache_key(body, content_type, version):
+    """
+    청크 본문, 형식, 엔드포인트/모델 버전을 묶은 SHA-256 키
+    """
+    h = hashlib.sha256()
+    for part in (version.encode('utf-8'), b'\0', content_type.encode('utf-8'), b'\0', body):
+        h.update(part)
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """
+    디스크(SQLite) 예측 결과 캐시. TTL이 지난 항목은 버리고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용하지 않은 항목부터 지움 (LRU)
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key):
+        """
+        (본문 bytes, Content-Type) 또는 None 반환
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, content_type, created_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM predictions WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE predictions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return bytes(row[0]), row[1]
+
+    def put(self, key, body, content_type):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(body), content_type, len(body), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM predictions WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        # 가장 오래 사용하지 않은 항목부터 초과분만큼 삭제
+        victims, freed = [], 0
+        for key, size in self._conn.execute("SELECT key, size FROM predictions ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM predictions WHERE key = ?", victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM predictions"
+            ).fetchone()
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,171 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_store import (
+    AVAILABLE_MODULES, COUNTER_COLUMNS, METRIC_COLUMNS, STORE_DIR,
+    append_segment, dataset_mtime, ensure_store, load_module, module_lock, read_window, tail_rows, write_dataset,
+)
+from features import DERIVED_COLUMNS
+
+# 세밀한 단위 → 거친 단위 순서 (pandas resample 주기)
+LEVELS = {
+    '1h': '1h',
+    '1D': '1D',
+    '1W': 'W-MON',
+}
+LEVEL_SPANS = {
+    '1h': pd.Timedelta(hours=1),
+    '1D': pd.Timedelta(days=1),
+    '1W': pd.Timedelta(weeks=1),
+}
+AGGREGATES = ['min', 'max', 'mean', 'last']
+ENERGY_COLUMN = 'accumActiveEnergy'
+
+
+def rollup_path(module_id, level, store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'rollup', f'module{module_id}_{level}.parquet')
+
+
+def compute_rollup(df, level, prev_energy=None):
+    """
+    원본 행을 level 단위 버킷으로 집계
+    지표(파생 지표 포함)별 min/max/mean/last와 accumActiveEnergy 차분으로 구한 구간 에너지(energy) 반환
+    prev_energy: 첫 버킷 직전의 누적 에너지 (증분 갱신 시 이어 붙이기 위해 사용)
+    """
+    metrics = [c for c in METRIC_COLUMNS + DERIVED_COLUMNS if c in df.columns and c not in COUNTER_COLUMNS]
+    resampler = df.set_index('localtime').resample(LEVELS[level], closed='left', label='left')
+
+    out = resampler[metrics].agg(AGGREGATES)
+    out.columns = [f'{col}_{agg}' for col, agg in out.columns]
+    out['count'] = resampler.size()
+
+    if ENERGY_COLUMN in df.columns:
+        energy_first = resampler[ENERGY_COLUMN].first()
+        energy_last = resampler[ENERGY_COLUMN].last()
+        prev = energy_last.ffill().shift(1)
+        prev.iloc[:1] = energy_first.iloc[:1] if prev_energy is None else prev_energy
+        out[f'{ENERGY_COLUMN}_last'] = energy_last
+        # 누적 카운터가 리셋된 구간은 음수가 되므로 0으로 자름
+        out['energy'] = (energy_last - prev).clip(lower=0)
+
+    out = out[out['count'] > 0]
+    float_cols = [c for c in out.columns if c not in ('count', f'{ENERGY_COLUMN}_last', 'energy')]
+    out[float_cols] = out[float_cols].astype(np.float32)
+    out['count'] = out['count'].astype(np.int32)
+    return out.rename_axis('localtime').reset_index()
+
+
+def _table(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write(df, path):
+    write_dataset(_table(df), path, compression='zstd')
+
+
+def build_rollups(module_id, store_dir=STORE_DIR):
+    """
+    모듈 전체 이력으로 모든 단위의 롤업을 다시 생성
+    """
+    with module_lock(module_id, store_dir):
+        df = load_module(module_id, store_dir=store_dir)
+        paths = {}
+        for level in LEVELS:
+            paths[level] = rollup_path(module_id, level, store_dir)
+            _write(compute_rollup(df, level), paths[level])
+        return paths
+
+
+def update_rollups(module_id, new_rows=None, store_dir=STORE_DIR):
+    """
+    마지막 버킷(미완성일 수 있음)부터만 다시 집계해 추가 세그먼트로 씀 (기존 롤업 파일은 다시 쓰지 않음)
+    다시 집계한 마지막 버킷은 읽을 때 기존 버킷을 대신함
+    new_rows: 저장소에 아직 반영되지 않은 신규 원본 행 (실시간 수집용)
+    """
+    with module_lock(module_id, store_dir):
+        if not all(os.path.exists(rollup_path(module_id, level, store_dir)) for level in LEVELS):
+            build_rollups(module_id, store_dir)
+
+        paths = {}
+        for level in LEVELS:
+            path = rollup_path(module_id, level, store_dir)
+            last = tail_rows(path, 2)
+            if last.empty:
+                _write(compute_rollup(load_module(module_id, store_dir=store_dir), level), path)
+                paths[level] = path
+                continue
+
+            last_start = last['localtime'].iloc[-1]
+            raw = load_module(module_id, start=last_start, store_dir=store_dir)
+            if new_rows is not None and len(new_rows):
+                raw = pd.concat([raw, new_rows[new_rows['localtime'] >= last_start]], ignore_index=True)
+                raw = raw.drop_duplicates('localtime', keep='last').sort_values('localtime')
+
+            prev_energy = None
+            if len(last) > 1 and f'{ENERGY_COLUMN}_last' in last.columns:
+                prev_energy = last[f'{ENERGY_COLUMN}_last'].iloc[-2]
+            tail = compute_rollup(raw, level, prev_energy=prev_energy)
+            if len(tail):
+                append_segment(_table(tail), path, compression='zstd')
+            paths[level] = path
+        return paths
+
+
+def ensure_rollups(module_id, store_dir=STORE_DIR):
+    """
+    롤업이 없거나 모듈 저장소보다 오래되었으면 다시 생성
+    """
+    src = ensure_store(module_id, store_dir=store_dir)
+    src_mtime = dataset_mtime(src)
+    for level in LEVELS:
+        path = rollup_path(module_id, level, store_dir)
+        if not os.path.exists(path) or dataset_mtime(path) < src_mtime:
+            return build_rollups(module_id, store_dir)
+    return {level: rollup_path(module_id, level, store_dir) for level in LEVELS}
+
+
+def pick_level(start, end, target_points):
+    """
+    [start, end) 구간에서 버킷 수가 target_points 이상인 가장 거친 단위를 반환
+    어느 단위로도 차트를 채우지 못할 만큼 짧은 구간이면 None (원본 사용)
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for level in reversed(list(LEVELS)):
+        if span / LEVEL_SPANS[level] >= target_points:
+            return level
+    return None
+
+
+def load_rollup(module_id, level, columns=None, start=None, end=None, store_dir=STORE_DIR):
+    """
+    롤업에서 [start, end) 구간을 읽음. columns는 'activePower_mean'처럼 집계 컬럼명으로 지정
+    """
+    ensure_rollups(module_id, store_dir)
+    if columns is not None:
+        columns = ['localtime'] + [c for c in columns if c != 'localtime']
+    return read_window(rollup_path(module_id, level, store_dir), columns, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈별 다중 해상도 롤업 생성")
+    parser.add_argument('--modules', type=int, nargs='*', default=AVAILABLE_MODULES)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--incremental', action='store_true', help="마지막 버킷부터만 다시 집계")
+    args = parser.parse_args()
+
+    for module_id in args.modules:
+        ensure_store(module_id, store_dir=args.store_dir)
+        if args.incremental:
+            paths = update_rollups(module_id, store_dir=args.store_dir)
+        else:
+            paths = build_rollups(module_id, args.store_dir)
+        sizes = ", ".join(f"{level} {len(read_window(path, ['localtime']))}행" for level, path in paths.items())
+        print(f"module{module_id}: {sizes}")
+
+
+if __name__ == '__main__':
+    main()
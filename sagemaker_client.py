@@ -0,0 +1,266 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from instrumentation import count, stage
+from payload_codec import content_type_for, decode_body, encode_frame
+from prediction_cache import cache_key
+
+ENDPOINT_NAME = 'tft-endpoint'
+REGION = 'ap-northeast-2'
+# SageMaker 실시간 엔드포인트 요청 본문 한도(6MB)보다 여유 있게 설정
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+MAX_WORKERS = 8
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+# 재배포를 알아채도록 모델 버전(EndpointConfigName)을 다시 조회하는 주기
+VERSION_TTL_SECONDS = 60
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """
+    잠시 후 다시 시도하면 성공할 수 있는 전송 오류 (스로틀링, 5xx, 연결 끊김 등)
+    """
+
+
+class Boto3Transport:
+    """
+    boto3 sagemaker-runtime 클라이언트로 엔드포인트 호출 (SigV4 서명, 커넥션 풀 공유)
+    """
+
+    def __init__(self, endpoint_name=ENDPOINT_NAME, region=REGION, max_pool_connections=MAX_WORKERS):
+        import boto3
+        from botocore.config import Config
+
+        self.endpoint_name = endpoint_name
+        self.region = region
+        # 재시도는 InferenceClient에서 청크 단위로 처리
+        config = Config(max_pool_connections=max_pool_connections, retries={'mode': 'standard', 'max_attempts': 1})
+        self.client = boto3.client('sagemaker-runtime', region_name=region, config=config)
+
+    def invoke(self, body, content_type, accept):
+        from botocore.exceptions import ClientError, ConnectionError, ReadTimeoutError
+
+        try:
+            resp = self.client.invoke_endpoint(
+                EndpointName=self.endpoint_name,
+                Body=body,
+                ContentType=content_type,
+                Accept=accept,
+            )
+        except (ConnectionError, ReadTimeoutError) as e:
+            raise RetryableError(str(e)) from e
+        except ClientError as e:
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            code = e.response.get('Error', {}).get('Code', '')
+            if status in RETRYABLE_STATUS or 'Throttl' in code:
+                raise RetryableError(str(e)) from e
+            raise
+        return resp['Body'].read(), resp.get('ContentType', accept)
+
+    def version(self):
+        # 배포마다 바뀌는 EndpointConfigName을 모델 버전으로 사용 (조회 권한이 없으면 엔드포인트 이름만)
+        try:
+            import boto3
+
+            desc = boto3.client('sagemaker', region_name=self.region).describe_endpoint(EndpointName=self.endpoint_name)
+            return f"sagemaker:{self.endpoint_name}:{desc['EndpointConfigName']}"
+        except Exception:
+            return f"sagemaker:{self.endpoint_name}"
+
+
+class HttpTransport:
+    """
+    일반 HTTP POST로 호출 (로컬 스텁 엔드포인트 테스트용)
+    """
+
+    def __init__(self, url, timeout=60, max_pool_connections=MAX_WORKERS):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_pool_connections, pool_maxsize=max_pool_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def invoke(self, body, content_type, accept):
+        import requests
+
+        try:
+            resp = self.session.post(
+                self.url, data=body, timeout=self.timeout,
+                headers={'Content-Type': content_type, 'Accept': accept},
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(str(e)) from e
+        if resp.status_code in RETRYABLE_STATUS:
+            raise RetryableError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+        resp.raise_for_status()
+        return resp.content, resp.headers.get('Content-Type', accept)
+
+    def version(self):
+        return f"http:{self.url}"
+
+
+def split_frame(df, encode, max_bytes=MAX_CHUNK_BYTES, time_col='localtime'):
+    """
+    한 모듈의 DataFrame을 시간순으로 정렬해, 인코딩 크기가 max_bytes 이하인 연속 구간들로 나눔
+    (앞쪽 표본으로 행당 크기를 추정하고, 넘치는 청크는 다시 반으로 나눔)
+    """
+    if time_col in df.columns:
+        df = df.sort_values(time_col, kind='stable')
+    df = df.reset_index(drop=True)
+    if df.empty:
+        return []
+
+    sample = df.iloc[:min(len(df), 200)]
+    per_row = max(len(encode(sample)) / len(sample), 1.0)
+    rows = max(int(max_bytes * 0.9 / per_row), 1)
+
+    chunks = []
+    pending = [df.iloc[i:i + rows] for i in range(0, len(df), rows)]
+    while pending:
+        part = pending.pop(0)
+        body = encode(part)
+        if len(body) > max_bytes and len(part) > 1:
+            half = len(part) // 2
+            pending[:0] = [part.iloc[:half], part.iloc[half:]]
+            continue
+        chunks.append((part, body))
+    return chunks
+
+
+def merge_responses(results):
+    """
+    청크 순서대로 응답을 합침
+    - 모두 DataFrame이면 concat
+    - 모두 리스트면 이어 붙임
+    - 모두 리스트 값을 가진 dict면 키별로 이어 붙임
+    - 그 외에는 응답 리스트 그대로 반환
+    """
+    if results and all(isinstance(r, pd.DataFrame) for r in results):
+        return pd.concat(results, ignore_index=True)
+    if results and all(isinstance(r, list) for r in results):
+        return [item for r in results for item in r]
+    if results and all(isinstance(r, dict) for r in results):
+        keys = list(results[0])
+        if all(list(r) == keys and all(isinstance(r[k], list) for k in keys) for r in results):
+            return {k: [item for r in results for item in r[k]] for k in keys}
+    return results
+
+
+class InferenceClient:
+    """
+    모듈/시간 구간별 청크로 나눠 동시에 호출하고, 재시도 후 원래 순서대로 응답을 합치는 추론 클라이언트
+    transport는 invoke(body, content_type, accept) -> (bytes, content_type)를 구현하면 교체 가능
+    codec/compress는 payload_codec 형식 이름과 gzip 여부 (응답도 같은 형식으로 요청)
+    cache(PredictionCache)를 주면 청크 본문 + 모델 버전이 같은 요청은 엔드포인트를 호출하지 않음
+    model_version을 주지 않으면 transport에서 VERSION_TTL_SECONDS마다 다시 조회 (클라이언트가 프로세스 내내 공유되므로)
+    """
+
+    def __init__(self, transport=None, max_chunk_bytes=MAX_CHUNK_BYTES, max_workers=MAX_WORKERS,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, codec='json-records', compress=False,
+                 cache=None, model_version=None):
+        self.transport = transport if transport is not None else Boto3Transport(max_pool_connections=max_workers)
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.codec = codec
+        self.compress = compress
+        self.content_type = content_type_for(codec, compress)
+        self.accept = self.content_type
+        self.cache = cache
+        self.model_version = model_version
+        self.version_ttl = VERSION_TTL_SECONDS
+        self._version = None
+        self._version_at = 0.0
+        self.last_stats = {'chunks': 0, 'cache_hits': 0}
+
+    def version(self):
+        if self.model_version is not None:
+            return self.model_version
+        now = time.monotonic()
+        if self._version is None or now - self._version_at > self.version_ttl:
+            self._version = self.transport.version() if hasattr(self.transport, 'version') else ''
+            self._version_at = now
+        return self._version
+
+    def encode(self, df):
+        return encode_frame(df, self.codec, self.compress)[0]
+
+    def decode(self, body, content_type):
+        return decode_body(body, content_type)
+
+    def make_chunks(self, frames):
+        """
+        {모듈: DataFrame}을 [(모듈, 순번, 본문 bytes)] 목록으로 변환
+        """
+        chunks = []
+        for module_id, df in frames.items():
+            for seq, (_, body) in enumerate(split_frame(df, self.encode, self.max_chunk_bytes)):
+                chunks.append((module_id, seq, body))
+        return chunks
+
+    def _invoke_with_retry(self, body):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.transport.invoke(body, self.content_type, self.accept)
+            except RetryableError:
+                if attempt == self.max_retries:
+                    raise
+                # 지수 백오프 + 지터로 동시 재시도가 몰리지 않게 함
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def invoke_chunk(self, body, version=''):
+        """
+        청크 하나를 호출해 (디코딩된 응답, 캐시 적중 여부) 반환
+        """
+        if self.cache is None:
+            payload, content_type = self._invoke_with_retry(body)
+            return self.decode(payload, content_type), False
+
+        key = cache_key(body, self.content_type, version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self.decode(*cached), True
+        payload, content_type = self._invoke_with_retry(body)
+        result = self.decode(payload, content_type)
+        # 디코딩에 성공한 응답만 저장
+        self.cache.put(key, payload, content_type)
+        return result, False
+
+    def predict(self, frames, on_progress=None):
+        """
+        frames: {모듈: DataFrame}. 청크를 동시에 호출하고 (모듈, 순번) 순서로 합친 결과 반환
+        on_progress(done, total): 청크가 하나 끝날 때마다 호출
+        """
+        with stage('predict.encode', rows=sum(len(df) for df in frames.values())) as s:
+            chunks = self.make_chunks(frames)
+            s.set(nbytes=sum(len(body) for _, _, body in chunks))
+        results = [None] * len(chunks)
+        # 이번 예측에 쓴 버전을 함께 남겨 평가 결과를 같은 버전으로 저장하게 함
+        version = self.version()
+        self.last_stats = {'chunks': len(chunks), 'cache_hits': 0, 'version': version}
+        if not chunks:
+            return merge_responses(results)
+
+        # 작업 스레드에는 계측 컨텍스트가 없으므로 왕복 전체를 호출 스레드에서 잼
+        with stage('predict.invoke', rows=len(chunks)):
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                futures = {pool.submit(self.invoke_chunk, body, version): i for i, (_, _, body) in enumerate(chunks)}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    results[futures[future]], hit = future.result()
+                    self.last_stats['cache_hits'] += hit
+                    if on_progress is not None:
+                        on_progress(done, len(chunks))
+        if self.cache is not None:
+            count('prediction_cache.hit', self.last_stats['cache_hits'])
+            count('prediction_cache.miss', len(chunks) - self.last_stats['cache_hits'])
+        with stage('predict.merge'):
+            return merge_responses(results)
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from fleet import load_fleet
+
+# 검증용 정답(rtu_ground_truth_may.csv)과 같은 정의: 요금 = 전력 × 180, 탄소 = 전력 × 0.424
+BILL_RATE = 180.0
+CARBON_FACTOR = 0.424
+HOURS_PER_WEEK = 24 * 7
+
+# 계시별(TOU) 예시 시간대: 평일 시각 → 구간. 주말은 전부 경부하
+TOU_WEEKDAY_BANDS = (
+    ['off'] * 8 +            # 00~07시 경부하
+    ['mid'] * 3 +            # 08~10시 중간부하
+    ['peak'] * 1 +           # 11시 최대부하
+    ['mid'] * 1 +            # 12시 중간부하
+    ['peak'] * 4 +           # 13~16시 최대부하
+    ['mid'] * 5 +            # 17~21시 중간부하
+    ['off'] * 2              # 22~23시 경부하
+)
+
+
+def flat_tariff(rate=BILL_RATE):
+    """
+    요일 × 시각(168칸) 단가표. 모든 시간 같은 단가
+    """
+    return np.full(HOURS_PER_WEEK, float(rate))
+
+
+def tou_tariff(off=BILL_RATE * 0.6, mid=BILL_RATE, peak=BILL_RATE * 1.6, weekday_bands=TOU_WEEKDAY_BANDS):
+    """
+    계시별 단가표 (168칸, 월요일 0시부터). 토·일은 경부하 단가
+    """
+    rates = {'off': off, 'mid': mid, 'peak': peak}
+    weekday = np.array([rates[band] for band in weekday_bands], dtype=np.float64)
+    weekend = np.full(24, float(off))
+    return np.concatenate([np.tile(weekday, 5), weekend, weekend])
+
+
+TARIFFS = {
+    'flat': flat_tariff(),
+    'tou': tou_tariff(),
+}
+
+
+def hour_of_week(index):
+    index = pd.DatetimeIndex(index)
+    return np.asarray(index.dayofweek * 24 + index.hour)
+
+
+def fleet_energy(start=None, end=None, column='activePower', modules=None):
+    """
+    저장소에서 [start, end) 구간을 읽어 (시간 인덱스, 모듈 목록, 시간 × 모듈 행렬) 반환
+    column: 'activePower'(정답의 hourly_pow와 같은 기준) 또는 'intervalEnergy'(누적 에너지 차분)
+    """
+    df = load_fleet(start, end, columns=['module', 'localtime', column], modules=modules)
+    wide = df.pivot_table(index='localtime', columns='module', values=column, aggfunc='sum', observed=True)
+    wide = wide.sort_index()
+    return wide.index, list(wide.columns), wide.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def compute_bill(energy, index, tariff=None, carbon_factor=CARBON_FACTOR):
+    """
+    (시간 × 모듈) 에너지 행렬에 시간대별 단가와 배출계수를 한 번에 적용
+    반환: (요금 행렬, 탄소 행렬)
+    """
+    tariff = TARIFFS['flat'] if tariff is None else np.asarray(tariff, dtype=np.float64)
+    energy = np.nan_to_num(energy)
+    rate = tariff[hour_of_week(index)][:, None]
+    return energy * rate, energy * carbon_factor
+
+
+def bill_series(energy, index, tariff=None, carbon_factor=CARBON_FACTOR):
+    """
+    전 모듈 합계를 정답 파일과 같은 형태로 반환
+    id, hourly_pow, may_bill, may_carbon, agg_pow(구간 합계) + cum_bill, cum_carbon(누적)
+    """
+    bill, carbon = compute_bill(energy, index, tariff, carbon_factor)
+    hourly_pow = np.nan_to_num(energy).sum(axis=1)
+    hourly_bill = bill.sum(axis=1)
+    hourly_carbon = carbon.sum(axis=1)
+    return pd.DataFrame({
+        'id': index,
+        'hourly_pow': hourly_pow,
+        'may_bill': hourly_bill,
+        'may_carbon': hourly_carbon,
+        'agg_pow': np.full(len(index), hourly_pow.sum()),
+        'cum_bill': np.cumsum(hourly_bill),
+        'cum_carbon': np.cumsum(hourly_carbon),
+    })
+
+
+def what_if(energy, index, modules, tariffs=None, carbon_factor=CARBON_FACTOR):
+    """
+    여러 단가표를 한 번의 행렬 곱으로 비교. 반환: 단가표 × 모듈 총 요금 DataFrame (+ 'total' 열)
+    """
+    tariffs = TARIFFS if tariffs is None else tariffs
+    rates = np.stack([np.asarray(t, dtype=np.float64) for t in tariffs.values()])[:, hour_of_week(index)]
+    totals = rates @ np.nan_to_num(energy)
+    out = pd.DataFrame(totals, index=list(tariffs), columns=modules)
+    out['total'] = out.sum(axis=1)
+    out['carbon'] = np.nansum(energy) * carbon_factor
+    return out.rename_axis('tariff')
+
+
+class BillAccumulator:
+    """
+    새로 들어온 시간의 에너지만 받아 누적 요금/탄소를 이어 가는 증분 계산기
+    """
+
+    def __init__(self, tariff=None, carbon_factor=CARBON_FACTOR):
+        self.tariff = TARIFFS['flat'] if tariff is None else np.asarray(tariff, dtype=np.float64)
+        self.carbon_factor = carbon_factor
+        self.cum_bill = 0.0
+        self.cum_carbon = 0.0
+        self.total_pow = 0.0
+        self.last_time = None
+
+    def update(self, energy, index):
+        """
+        energy: (시간 × 모듈) 행렬, index: 시간 인덱스. 이미 반영한 시각 이전 행은 건너뜀
+        반환: 새 시간들의 bill_series 형식 DataFrame (누적값은 이전 호출에서 이어짐)
+        """
+        index = pd.DatetimeIndex(index)
+        if self.last_time is not None:
+            keep = index > self.last_time
+            energy, index = energy[keep], index[keep]
+        out = bill_series(energy, index, self.tariff, self.carbon_factor)
+        if len(out):
+            out['cum_bill'] += self.cum_bill
+            out['cum_carbon'] += self.cum_carbon
+            self.cum_bill = float(out['cum_bill'].iloc[-1])
+            self.cum_carbon = float(out['cum_carbon'].iloc[-1])
+            self.total_pow += float(out['hourly_pow'].sum())
+            self.last_time = index[-1]
+        out['agg_pow'] = self.total_pow
+        return out
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from anomaly_engine import (
+    FEATURES, MODEL_VERSION, _residuals, fit_model, load_model, model_path, model_version, save_model, score_module,
+)
+from data_store import load_module
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'csv')
+
+
+def test_row_at_training_mean_has_no_residual(tmp_path):
+    df = load_module(5, columns=FEATURES, csv_dir=CSV_DIR, store_dir=str(tmp_path))
+    model = fit_model(df)
+    # 주성분을 학습한 중심(표준화 공간의 평균)에 있는 행은 재구성 잔차가 0
+    assert np.allclose(_residuals(model['mean'][None, :], model), 0.0)
+
+
+def test_old_model_format_is_refit(tmp_path):
+    store_dir = str(tmp_path)
+    score_module(5, store_dir=store_dir)
+    path = model_path(5, store_dir)
+    # 형식 번호가 없던 이전 모델처럼 저장
+    old = {key: value for key, value in load_model(path).items() if key not in ('version', 'mean')}
+    save_model(old, path)
+    assert model_version(path) == 1
+
+    scores = score_module(5, store_dir=store_dir)
+    assert model_version(path) == MODEL_VERSION
+    assert isinstance(scores, pd.DataFrame) and len(scores)
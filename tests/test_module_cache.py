@@ -0,0 +1,22 @@
+import os
+
+import numpy as np
+
+from charts import COLUMN_GROUPS
+from data_service import ModuleCache
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'csv')
+
+
+def test_window_columns_share_memory_with_cached_frame(tmp_path):
+    cache = ModuleCache(csv_dir=CSV_DIR, store_dir=str(tmp_path))
+    full = cache.get(1)
+    start, end = full['localtime'].iloc[100], full['localtime'].iloc[500]
+    # 1페이지처럼 저장 순서와 다른 순서로 열을 고름
+    columns = [c for group in COLUMN_GROUPS.values() for c in group][::-1]
+
+    view = cache.window(1, columns, start, end)
+
+    assert len(view) == 400
+    for col in columns:
+        assert np.shares_memory(view[col].to_numpy(), full[col].to_numpy()), col
@@ -0,0 +1,62 @@
+import json
+import time
+
+import pandas as pd
+
+from prediction_cache import PredictionCache
+from sagemaker_client import InferenceClient
+
+
+class FakeTransport:
+    """
+    요청 수를 세고 청크 행 수를 돌려주는 가짜 엔드포인트
+    """
+
+    def __init__(self, version='fake:v1'):
+        self.calls = 0
+        self.model = version
+
+    def invoke(self, body, content_type, accept):
+        self.calls += 1
+        return json.dumps([{'rows': 1}]).encode('utf-8'), 'application/json'
+
+    def version(self):
+        return self.model
+
+
+def make_frames():
+    times = pd.date_range('2025-04-01', periods=48, freq='h').strftime('%Y-%m-%d %H:%M:%S')
+    return {m: pd.DataFrame({'localtime': times, 'activePower': float(m)}) for m in (1, 2, 3)}
+
+
+def make_client(tmp_path, transport, compress):
+    cache = PredictionCache(path=str(tmp_path / 'cache.sqlite'))
+    return InferenceClient(transport, max_chunk_bytes=1024, codec='json-records', compress=compress, cache=cache)
+
+
+def test_gzip_resubmission_hits_cache(tmp_path):
+    transport = FakeTransport()
+    client = make_client(tmp_path, transport, compress=True)
+    client.predict(make_frames())
+    first_calls = transport.calls
+    assert first_calls > 1
+
+    # gzip 헤더의 시각이 바뀌어도 같은 본문이 나와야 함
+    time.sleep(1.1)
+    client.predict(make_frames())
+    assert client.last_stats['cache_hits'] == client.last_stats['chunks']
+    assert transport.calls == first_calls
+
+
+def test_redeploy_invalidates_cache(tmp_path):
+    transport = FakeTransport()
+    client = make_client(tmp_path, transport, compress=False)
+    client.predict(make_frames())
+    first_calls = transport.calls
+
+    transport.model = 'fake:v2'
+    client.version_ttl = 0
+    client.predict(make_frames())
+    assert client.last_stats['version'] == 'fake:v2'
+    assert client.last_stats['cache_hits'] == 0
+    assert transport.calls == 2 * first_calls
@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+from anomaly_engine import scores_path, score_module
+from data_service import ModuleCache
+from data_store import csv_path, dataset_files, ingest_module, read_window, store_path
+from live_tail import poll_module
+from rollup import LEVELS, build_rollups, rollup_path
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'csv')
+MODULE = 1
+
+
+def csv_lines():
+    with open(csv_path(MODULE, CSV_DIR), 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+def write_csv(csv_dir, lines):
+    os.makedirs(csv_dir, exist_ok=True)
+    with open(csv_path(MODULE, csv_dir), 'wb') as f:
+        f.write(b''.join(lines))
+
+
+def append_csv(csv_dir, lines):
+    with open(csv_path(MODULE, csv_dir), 'ab') as f:
+        f.write(b''.join(lines))
+
+
+def setup_store(csv_dir, store_dir, lines):
+    write_csv(csv_dir, lines)
+    ingest_module(MODULE, csv_dir, store_dir)
+    build_rollups(MODULE, store_dir)
+    score_module(MODULE, store_dir=store_dir)
+
+
+def assert_matches_fresh_ingest(tmp_path, csv_dir, store_dir, cache):
+    fresh = str(tmp_path / 'fresh')
+    ingest_module(MODULE, csv_dir, fresh)
+    build_rollups(MODULE, fresh)
+
+    expected = read_window(store_path(MODULE, fresh))
+    pd.testing.assert_frame_equal(read_window(store_path(MODULE, store_dir)), expected)
+    pd.testing.assert_frame_equal(cache.get(MODULE), expected)
+    for level in LEVELS:
+        pd.testing.assert_frame_equal(read_window(rollup_path(MODULE, level, store_dir)),
+                                      read_window(rollup_path(MODULE, level, fresh)),
+                                      check_exact=False, rtol=1e-4)
+    scores = read_window(scores_path(MODULE, store_dir), time_col='timestamp')
+    assert scores['timestamp'].tolist() == expected['localtime'].tolist()
+
+
+def test_segment_appends_match_fresh_ingest(tmp_path, monkeypatch):
+    # 31번 추가하는 동안 적어도 한 번은 합치도록 세그먼트 한도를 낮춤
+    monkeypatch.setattr(data_store, 'MAX_SEGMENTS', 8)
+    csv_dir, store_dir = str(tmp_path / 'csv'), str(tmp_path / 'store')
+    lines = csv_lines()
+    step, appends = 20, 31
+    head = len(lines) - step * appends
+    setup_store(csv_dir, store_dir, lines[:head])
+    cache = ModuleCache(csv_dir=csv_dir, store_dir=store_dir)
+    cache.get(MODULE)
+
+    max_files = 0
+    for pos in range(head, len(lines), step):
+        append_csv(csv_dir, lines[pos:pos + step])
+        assert poll_module(MODULE, csv_dir, store_dir) == len(lines[pos:pos + step])
+        cache.get(MODULE)
+        max_files = max(max_files, len(dataset_files(store_path(MODULE, store_dir))))
+
+    assert max_files == data_store.MAX_SEGMENTS + 1
+    assert data_store._compacted_through(store_path(MODULE, store_dir)) >= data_store.MAX_SEGMENTS
+    assert_matches_fresh_ingest(tmp_path, csv_dir, store_dir, cache)
+
+
+def test_late_row_falls_back_to_full_rewrite(tmp_path):
+    csv_dir, store_dir = str(tmp_path / 'csv'), str(tmp_path / 'store')
+    lines = csv_lines()
+    late = len(lines) // 2
+    setup_store(csv_dir, store_dir, lines[:late] + lines[late + 1:-40])
+    cache = ModuleCache(csv_dir=csv_dir, store_dir=store_dir)
+    cache.get(MODULE)
+
+    # 뒤에 붙는 행은 세그먼트로 추가
+    append_csv(csv_dir, lines[-40:])
+    assert poll_module(MODULE, csv_dir, store_dir) == 40
+    assert len(dataset_files(store_path(MODULE, store_dir))) == 2
+    cache.get(MODULE)
+
+    # 이미 저장된 시각 사이에 늦게 도착한 행은 전체를 다시 씀
+    append_csv(csv_dir, [lines[late]])
+    assert poll_module(MODULE, csv_dir, store_dir) is None
+    assert len(dataset_files(store_path(MODULE, store_dir))) == 1
+    assert_matches_fresh_ingest(tmp_path, csv_dir, store_dir, cache)
+
+
+@pytest.mark.parametrize('level', list(LEVELS))
+def test_later_segment_replaces_last_rollup_bucket(tmp_path, level):
+    csv_dir, store_dir = str(tmp_path / 'csv'), str(tmp_path / 'store')
+    lines = csv_lines()
+    setup_store(csv_dir, store_dir, lines[:-30])
+    append_csv(csv_dir, lines[-30:])
+    poll_module(MODULE, csv_dir, store_dir)
+
+    rolled = read_window(rollup_path(MODULE, level, store_dir))
+    assert rolled['localtime'].is_unique and rolled['localtime'].is_monotonic_increasing
+    assert rolled['count'].sum() == len(read_window(store_path(MODULE, store_dir)))
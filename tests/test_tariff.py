@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from tariff import TARIFFS, BillAccumulator, bill_series
+
+
+def make_energy():
+    # 2주(336시간) × 3모듈, 결측 포함
+    index = pd.date_range('2025-05-05', periods=24 * 14, freq='h')
+    rng = np.random.default_rng(0)
+    energy = rng.uniform(0, 500, size=(len(index), 3))
+    energy[10, 1] = np.nan
+    return index, energy
+
+
+def test_accumulator_matches_bill_series_over_split_index():
+    index, energy = make_energy()
+    expected = bill_series(energy, index, TARIFFS['tou'])
+
+    acc = BillAccumulator(TARIFFS['tou'])
+    splits = [0, 5, 100, 101, 250, len(index)]
+    parts = [acc.update(energy[lo:hi], index[lo:hi]) for lo, hi in zip(splits, splits[1:])]
+    result = pd.concat(parts, ignore_index=True)
+
+    columns = ['id', 'hourly_pow', 'may_bill', 'may_carbon', 'cum_bill', 'cum_carbon']
+    pd.testing.assert_frame_equal(result[columns], expected[columns])
+    # agg_pow는 지금까지 반영한 합계이므로 마지막 갱신에서 전체 구간 합계와 같아짐
+    assert np.allclose(parts[-1]['agg_pow'], expected['agg_pow'].iloc[0])
+
+
+def test_accumulator_skips_hours_already_applied():
+    index, energy = make_energy()
+    expected = bill_series(energy, index)
+
+    acc = BillAccumulator()
+    acc.update(energy[:200], index[:200])
+    # 이미 반영한 시간과 겹쳐 다시 보내도 새 시간만 더함
+    tail = acc.update(energy[150:], index[150:])
+
+    assert tail['id'].iloc[0] == index[200]
+    assert np.isclose(acc.cum_bill, expected['cum_bill'].iloc[-1])
+    assert np.isclose(acc.cum_carbon, expected['cum_carbon'].iloc[-1])
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_indices
+
+
+class ThresholdIndex:
+    """
+    한 모듈·시간 구간의 total_error를 내림차순으로 정렬해 둔 색인
+    기준값 t에 대한 이상치 수는 이진 탐색, 상위 원인 지표별 건수는 누적합으로 바로 구함
+    (기준값이 바뀌어도 전체 비교나 정렬을 다시 하지 않음)
+    """
+
+    def __init__(self, scores, feature_col='top_1_feature', details=None):
+        ts = scores['timestamp'].to_numpy()
+        err = scores['total_error'].to_numpy(dtype=np.float64)
+        # 점수가 없는 행은 어떤 기준으로도 이상치가 아니도록 맨 뒤로 보냄
+        ranked = np.nan_to_num(err, nan=-np.inf)
+        order = np.argsort(-ranked, kind='stable')
+        self.n = len(err)
+        self.timestamps = ts[order]
+        self.errors = ranked[order]
+        # searchsorted용 오름차순 사본
+        self._ascending = self.errors[::-1]
+
+        features = scores[feature_col].astype('category')
+        self.features = list(features.cat.categories)
+        self.codes = features.cat.codes.to_numpy()[order]
+        onehot = np.zeros((self.n + 1, len(self.features)), dtype=np.int32)
+        valid = self.codes >= 0
+        onehot[1:][np.flatnonzero(valid), self.codes[valid]] = 1
+        # prefix[k]: 오차 상위 k개 중 지표별 top_1 건수
+        self.prefix = np.cumsum(onehot, axis=0)
+
+        # 이상치 목록에 함께 보여줄 행별 값 (scores와 같은 순서의 DataFrame)
+        self.details = {} if details is None else {c: details[c].to_numpy()[order] for c in details.columns}
+
+        # 기준값과 무관한 오차 추이 선은 한 번만 축약해 둠
+        line = downsample_indices(ts, err)
+        self.line_x, self.line_y = ts[line], err[line]
+
+    def count(self, threshold):
+        """
+        total_error > threshold 인 행 수
+        """
+        return self.n - int(np.searchsorted(self._ascending, threshold, side='right'))
+
+    def anomalies(self, threshold):
+        """
+        이상치의 timestamp, total_error, top_1_feature(와 색인에 담아 둔 행별 값)를 시간순 DataFrame으로 반환
+        """
+        k = self.count(threshold)
+        order = np.argsort(self.timestamps[:k], kind='stable')
+        return pd.DataFrame({
+            'timestamp': self.timestamps[:k][order],
+            'total_error': self.errors[:k][order],
+            'top_1_feature': pd.Categorical.from_codes(self.codes[:k][order], categories=self.features),
+            **{col: values[:k][order] for col, values in self.details.items()},
+        })
+
+    def feature_breakdown(self, threshold):
+        """
+        이상치들의 top_1_feature별 건수 (많은 순)
+        """
+        counts = pd.Series(self.prefix[self.count(threshold)], index=self.features, name='count')
+        return counts[counts > 0].sort_values(ascending=False)
+
+    @property
+    def max_error(self):
+        return float(self.errors[0]) if self.n and np.isfinite(self.errors[0]) else 0.0
+
+
+def lookup_rows(times, frame, columns, time_col='localtime'):
+    """
+    time_col로 정렬된 frame에서 times 시각의 columns 값을 이진 탐색으로 찾음
+    (같은 시각이 여러 행이면 마지막 행, 없는 시각은 NaN)
+    """
+    keys = frame[time_col].to_numpy()
+    times = np.asarray(times).astype(keys.dtype)
+    pos = np.searchsorted(keys, times, side='right') - 1
+    found = pos >= 0
+    found[found] = keys[pos[found]] == times[found]
+    out = {}
+    for col in columns:
+        values = np.full(len(times), np.nan)
+        values[found] = frame[col].to_numpy(dtype=np.float64)[pos[found]]
+        out[col] = values
+    return pd.DataFrame(out)
+
+
+def build_index(scores, start=None, end=None, frame=None, columns=()):
+    """
+    timestamp로 정렬된 점수에서 [start, end] 구간만 이진 탐색으로 잘라 색인 생성
+    frame을 주면 각 시각의 columns 값(예: 파생 지표)을 색인을 만들 때 한 번만 찾아 둠
+    """
+    ts = scores['timestamp']
+    lo = 0 if start is None else ts.searchsorted(pd.Timestamp(start), side='left')
+    hi = len(scores) if end is None else ts.searchsorted(pd.Timestamp(end), side='right')
+    scores = scores.iloc[lo:hi]
+    details = None if frame is None else lookup_rows(scores['timestamp'], frame, columns)
+    return ThresholdIndex(scores, details=details)
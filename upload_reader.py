@@ -0,0 +1,114 @@
+import io
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_store import METRIC_COLUMNS
+from features import DERIVED_COLUMNS
+from instrumentation import stage
+
+CHUNK_ROWS = 100_000
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+ParsedCSV = namedtuple('ParsedCSV', ['df', 'timestamp_cols'])
+# 이름을 아는 지표 컬럼은 숫자가 아닌 값이 섞여 있어도 결측으로 바꿔 실수형 유지
+NUMERIC_COLUMNS = set(METRIC_COLUMNS) | set(DERIVED_COLUMNS)
+
+
+def find_timestamp_columns(columns):
+    # timestamp 관련 컬럼 찾기 (localtime 포함)
+    return [col for col in columns if 'time' in col.lower() or 'date' in col.lower()]
+
+
+def _compact_chunk(chunk, timestamp_cols):
+    """
+    청크 하나를 시간 컬럼은 datetime, 실수 컬럼은 float32로 바꿔 Arrow 테이블로 변환
+    """
+    for col in chunk.columns:
+        if col in timestamp_cols:
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+        elif col in NUMERIC_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float32)
+        elif pd.api.types.is_float_dtype(chunk[col]):
+            chunk[col] = chunk[col].astype(np.float32)
+    return pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+def read_csv_stream(fileobj, chunk_rows=CHUNK_ROWS, encoding='utf-8-sig'):
+    """
+    CSV를 chunk_rows 단위로 한 번만 읽음. 첫 청크의 헤더로 시간 컬럼을 찾고,
+    청크마다 압축된 Arrow 테이블로 바꿔 쌓으므로 원본 텍스트 전체를 메모리에 올리지 않음
+    """
+    timestamp_cols = None
+    tables = []
+    for chunk in pd.read_csv(fileobj, chunksize=chunk_rows, encoding=encoding):
+        if timestamp_cols is None:
+            timestamp_cols = find_timestamp_columns(chunk.columns)
+        tables.append(_compact_chunk(chunk, timestamp_cols))
+
+    if not tables:
+        return ParsedCSV(pd.DataFrame(), [])
+    return ParsedCSV(_concat(tables).to_pandas(), timestamp_cols)
+
+
+def _concat(tables):
+    """
+    청크마다 추론된 타입이 다를 수 있으므로(예: 전부 결측인 청크) 넓은 쪽으로 맞춰 합침
+    숫자와 문자열처럼 합칠 수 없는 컬럼은 문자열로 바꿈 (한 번에 읽었을 때의 object 컬럼과 같은 결과)
+    """
+    try:
+        return pa.concat_tables(tables, promote_options='permissive')
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        pass
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    mixed = {name for name, found in types.items() if len(found) > 1}
+    cast = []
+    for table in tables:
+        for name in mixed & set(table.column_names):
+            i = table.schema.get_field_index(name)
+            table = table.set_column(i, name, table.column(i).cast(pa.large_string()))
+        cast.append(table)
+    return pa.concat_tables(cast, promote_options='permissive')
+
+
+def _read_member(buf, name, chunk_rows):
+    # ZipFile은 스레드 간 공유가 안전하지 않으므로 멤버마다 따로 엶 (압축 바이트는 공유)
+    with zipfile.ZipFile(io.BytesIO(buf)) as zf, zf.open(name) as member:
+        return read_csv_stream(member, chunk_rows)
+
+
+def read_zip(fileobj, chunk_rows=CHUNK_ROWS, max_workers=MAX_WORKERS):
+    """
+    ZIP 안의 모든 CSV 멤버를 스레드 풀로 동시에 스트리밍 파싱해 {멤버 이름: ParsedCSV} 반환
+    """
+    buf = fileobj.getvalue() if hasattr(fileobj, 'getvalue') else fileobj.read()
+    with zipfile.ZipFile(io.BytesIO(buf)) as zf:
+        names = [name for name in zf.namelist() if name.endswith('.csv')]
+    if not names:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        results = pool.map(lambda name: _read_member(buf, name, chunk_rows), names)
+        return dict(zip(names, results))
+
+
+def read_upload(uploaded_file, chunk_rows=CHUNK_ROWS):
+    """
+    업로드된 CSV 또는 ZIP을 {파일 이름: ParsedCSV}로 변환
+    """
+    with stage('upload.parse', nbytes=getattr(uploaded_file, 'size', None)) as s:
+        if uploaded_file.name.endswith('.zip'):
+            parsed = read_zip(uploaded_file, chunk_rows)
+        else:
+            parsed = {uploaded_file.name: read_csv_stream(uploaded_file, chunk_rows)}
+        s.set(rows=sum(len(p.df) for p in parsed.values()))
+    return parsed